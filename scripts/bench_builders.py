@@ -0,0 +1,141 @@
+# scripts/bench_builders.py
+# End-to-end benchmark of the builders against a synthetic channel served by fake_youtube.py
+# (child process), with per-stage times taken from each run's PROFILE=1 report.
+#
+#   BENCH_VIDEOS=200 BENCH_CUES=150 BENCH_LATENCY=0.03 BENCH_ERRORS=0.02 python scripts/bench_builders.py
+#   python scripts/bench_builders.py --save bench-baseline.json      # record a baseline
+#   python scripts/bench_builders.py --baseline bench-baseline.json  # exit 1 on regressions
+#
+# Runs (BENCH_ONLY=name,name to pick):
+#   api.threads / api.async   build_index_from_api_transcripts.py, local captions for BENCH_LOCAL of the videos
+#   api.incremental           same, second run with INCREMENTAL=1 (everything unchanged)
+#   srt                       build_index_from_srt.py over the local caption tree (BENCH_MIX of srt/sbv/vtt)
+#   fetch_captions            fetch_captions_api.py (OAuth + captions.list + captions.download)
+# Each run is repeated BENCH_RUNS times; the fastest wall time and fastest time per stage are kept. A run regresses when its wall time,
+# or a stage that took at least MIN_STAGE_S, is more than BENCH_TOLERANCE and MIN_DELTA_S slower
+# than in the baseline (the absolute floor keeps scheduler noise on short stages out).
+
+import os, sys, json, time, shutil, tempfile, subprocess
+from fake_youtube import SyntheticChannel, spawn
+
+VIDEOS    = int(os.getenv("BENCH_VIDEOS", "200"))
+CUES      = int(os.getenv("BENCH_CUES", "150"))
+VARY      = float(os.getenv("BENCH_VARY", "0.5"))
+LATENCY   = float(os.getenv("BENCH_LATENCY", "0.02"))
+ERRORS    = float(os.getenv("BENCH_ERRORS", "0.0"))
+LOCAL     = float(os.getenv("BENCH_LOCAL", "0.5"))
+MIX       = os.getenv("BENCH_MIX", "srt,sbv,vtt")
+RUNS      = int(os.getenv("BENCH_RUNS", "3"))
+ONLY      = [x for x in os.getenv("BENCH_ONLY", "").split(",") if x]
+TOLERANCE = float(os.getenv("BENCH_TOLERANCE", "0.25"))
+MIN_STAGE_S = 0.1
+MIN_DELTA_S = 0.05
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+API  = os.path.join(HERE, "build_index_from_api_transcripts.py")
+RUN_DEFS = [
+    ("api.threads",     API, {}, None),
+    ("api.async",       API, {"ASYNC": "1"}, None),
+    ("api.incremental", API, {"INCREMENTAL": "1"}, "prime"),
+    ("srt",             os.path.join(HERE, "build_index_from_srt.py"), {}, None),
+    ("fetch_captions",  os.path.join(HERE, "fetch_captions_api.py"), {}, None),
+]
+
+def run_once(script, env, workdir, fresh=True):
+    if fresh:
+        shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(workdir, exist_ok=True)
+    env = {**env, "PROFILE_PATH": os.path.join(workdir, "profile.json")}
+    t0 = time.perf_counter()
+    r = subprocess.run([sys.executable, script], cwd=workdir, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    if r.returncode:
+        raise SystemExit(f"{os.path.basename(script)} failed:\n{r.stdout[-2000:]}\n{r.stderr[-2000:]}")
+    with open(env["PROFILE_PATH"], "r", encoding="utf-8") as f:
+        report = json.load(f)
+    http = report.get("http", {}).get("endpoints", {})
+    return {"wall_s": round(wall, 3),
+            "stages": {k: round(v["total_s"], 3) for k, v in report["stages"].items()},
+            "pools": {k: v["utilization"] for k, v in report.get("pools", {}).items()},
+            "http_calls": sum(e["calls"] for e in http.values()),
+            "http_retries": sum(e["retries"] for e in http.values()),
+            "peak_rss_mb": report.get("peak_rss_mb")}
+
+def bench(root, base_env):
+    results = {}
+    for name, script, extra, mode in RUN_DEFS:
+        if ONLY and name not in ONLY:
+            continue
+        env = {**base_env, **extra}
+        best = None
+        for _ in range(RUNS):
+            workdir = os.path.join(root, name)
+            t = run_once(script, env, workdir)
+            if mode == "prime":  # time the unchanged rebuild in the same directory
+                t = run_once(script, env, workdir, fresh=False)
+            if best is None:
+                best = t
+            else:  # fastest wall and, separately, fastest time seen for each stage
+                stages = {k: min(v, best["stages"].get(k, v)) for k, v in t["stages"].items()}
+                best = {**(t if t["wall_s"] < best["wall_s"] else best), "stages": stages}
+        results[name] = best
+        top = sorted(best["stages"].items(), key=lambda kv: -kv[1])[:4]
+        print(f"  {name:<16} {best['wall_s']:7.2f}s  http:{best['http_calls']:<5} retries:{best['http_retries']:<4} "
+              f"rss:{best['peak_rss_mb']} MiB  " + "  ".join(f"{k}:{v:.2f}s" for k, v in top))
+    return results
+
+def compare(results, baseline):
+    """Return regression messages for results vs a saved baseline (same config expected)."""
+    out = []
+    for name, cur in results.items():
+        old = baseline["results"].get(name)
+        if not old:
+            continue
+        checks = [("wall", old["wall_s"], cur["wall_s"])]
+        checks += [(f"stage {k}", v, cur["stages"].get(k, 0.0)) for k, v in old["stages"].items() if v >= MIN_STAGE_S]
+        for what, before, now in checks:
+            if now > before * (1 + TOLERANCE) and now - before >= MIN_DELTA_S:
+                out.append(f"{name}: {what} {before:.2f}s -> {now:.2f}s (+{(now / before - 1) * 100:.0f}%)")
+    return out
+
+def main():
+    args = sys.argv[1:]
+    save = args[args.index("--save") + 1] if "--save" in args else None
+    baseline_path = args[args.index("--baseline") + 1] if "--baseline" in args else None
+    config = {"videos": VIDEOS, "cues": CUES, "vary": VARY, "latency": LATENCY, "errors": ERRORS,
+              "local": LOCAL, "mix": MIX}
+
+    root = tempfile.mkdtemp(prefix="bench-builders-")
+    server, server_env = spawn(VIDEOS, CUES, LATENCY, error_rate=ERRORS, vary=VARY)
+    try:
+        local = os.path.join(root, "captions")
+        n_local = SyntheticChannel(VIDEOS, CUES, vary=VARY).write_captions(local, LOCAL, MIX)
+        base_env = {**os.environ, **server_env, "PROFILE": "1", "HTTP_RATE": "0", "HTTP_BACKOFF": "0.01",
+                    "YOUTUBE_API_KEY": "bench", "YT_CLIENT_ID": "bench", "YT_CLIENT_SECRET": "bench",
+                    "YT_REFRESH_TOKEN": "bench", "SRT_DIR": local, "CAPTIONS_DIR": local}
+        base_env.pop("HTTP_CACHE_DIR", None)
+        print(f"videos={VIDEOS} cues~{CUES} (+/-{VARY:.0%}) latency={LATENCY * 1000:.0f}ms errors={ERRORS:.0%} "
+              f"local captions={n_local} ({MIX})")
+        results = bench(root, base_env)
+    finally:
+        server.terminate()
+        shutil.rmtree(root, ignore_errors=True)
+
+    if save:
+        with open(save, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+        print(f"baseline saved to {save}")
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != config:
+            print(f"⚠️ baseline config differs: {baseline.get('config')}")
+        regressions = compare(results, baseline)
+        for msg in regressions:
+            print(f"❌ {msg}")
+        if regressions:
+            return 1
+        print(f"✅ no regressions beyond {TOLERANCE:.0%}")
+
+if __name__ == "__main__":
+    sys.exit(main())
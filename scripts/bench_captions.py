@@ -0,0 +1,117 @@
+# scripts/bench_captions.py
+# Single-regex caption parsers (captions.py) vs the previous line-by-line ones, on the local
+# .sbv files (SRT_DIR, default srt/) and SRT/VTT renderings of the same cues.
+# Also counts cues the two disagree on (legacy starts are truncated to whole seconds; the old VTT
+# parser also dropped cue text starting with "note"/"style", taking it for a NOTE/STYLE block).
+#
+#   SRT_DIR=srt RUNS=20 python scripts/bench_captions.py
+
+import os, sys, re, time
+from captions import CaptionCatalog, parse_srt, parse_sbv, parse_vtt
+from fake_youtube import render_srt, render_vtt
+
+SRT_DIR = os.getenv("SRT_DIR", "srt")
+RUNS    = int(os.getenv("RUNS", "20"))
+
+# ---------- previous implementations ----------
+def normalize_text(s):
+    if not s: return ""
+    s = re.sub(r"\s+", " ", s.replace("\u00A0", " ")).strip()
+    return s
+
+SBV_TIMECODE = re.compile(r'^\s*(\d{1,2}:)?\d{1,2}:\d{2}(?:\.\d+)?\s*,\s*(\d{1,2}:)?\d{1,2}:\d{2}(?:\.\d+)?\s*$')
+
+def vtt_to_seconds(ts):
+    ts = ts.replace(",", ".")
+    parts = ts.split(":")
+    if len(parts) == 3:
+        h, m, s = parts
+    else:
+        h, m, s = "0", parts[0], parts[1]
+    return int(float(h)*3600 + float(m)*60 + float(s))
+
+def _sbv_time_to_seconds(tc):
+    parts = tc.strip().split(':')
+    if len(parts) == 3:
+        h, m, s = int(parts[0]), int(parts[1]), float(parts[2])
+    else:
+        h, m, s = 0, int(parts[0]), float(parts[1])
+    return int(h*3600 + m*60 + s)
+
+def legacy_srt(content, src="srt"):
+    import srt
+    segs = []
+    try:
+        subs = list(srt.parse(content))
+    except Exception:
+        subs = []
+    for sub in subs:
+        txt = normalize_text(sub.content or "")
+        if not txt: continue
+        segs.append({"start": int(sub.start.total_seconds()), "text": txt, "norm": txt.lower(), "src": src})
+    return segs
+
+def legacy_sbv(content, src="srt"):
+    segs = []
+    for block in re.split(r'\r?\n\r?\n', content.strip()):
+        lines = [ln.strip() for ln in block.splitlines() if ln.strip()]
+        if not lines: continue
+        if not SBV_TIMECODE.match(lines[0]): continue
+        start = _sbv_time_to_seconds(lines[0].split(',')[0].strip())
+        text = normalize_text(' '.join(lines[1:]))
+        if text:
+            segs.append({"start": start, "text": text, "norm": text.lower(), "src": src})
+    return segs
+
+def legacy_vtt(vtt_text, src="transcript"):
+    segs = []
+    lines = [ln.rstrip("\n") for ln in vtt_text.splitlines()]
+    i = 0
+    while i < len(lines):
+        ln = lines[i]
+        if "-->" in ln:
+            start = ln.split("-->")[0].strip()
+            i += 1
+            buf = []
+            while i < len(lines) and lines[i].strip():
+                if lines[i].strip().upper().startswith(("NOTE","STYLE")):
+                    break
+                buf.append(lines[i]); i += 1
+            text = normalize_text(" ".join(buf))
+            if text:
+                segs.append({"start": vtt_to_seconds(start), "text": text, "norm": text.lower(), "src": src})
+        i += 1
+    return segs
+
+def best_of(fn, docs):
+    best = float("inf")
+    for _ in range(RUNS):
+        t0 = time.perf_counter()
+        for d in docs:
+            fn(d)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+def main():
+    catalog = CaptionCatalog(SRT_DIR)
+    sbv = []
+    for vid in catalog:
+        with open(catalog.best(vid), "r", encoding="utf-8", errors="ignore") as f:
+            sbv.append(f.read())
+    cues = [[(s["start"], s["text"]) for s in parse_sbv(d)] for d in sbv]
+    formats = [("sbv", sbv, legacy_sbv, parse_sbv),
+               ("srt", [render_srt(c, dur=2) for c in cues], legacy_srt, parse_srt),
+               ("vtt", [render_vtt(c, dur=2, settings="align:start position:0%") for c in cues], legacy_vtt, parse_vtt)]
+    n_cues = sum(len(c) for c in cues)
+    print(f"corpus: {len(sbv)} files, {n_cues} cues per format; best of {RUNS}")
+    for name, docs, old, new in formats:
+        try:
+            t_old = best_of(old, docs)
+        except ImportError as e:
+            print(f"  {name}: legacy parser unavailable ({e})"); continue
+        t_new = best_of(new, docs)
+        diff = sum(len({(int(a["start"]), a["text"]) for a in new(d)} ^ {(b["start"], b["text"]) for b in old(d)}) for d in docs)
+        print(f"  {name}  legacy {t_old:8.2f} ms   regex {t_new:8.2f} ms   ({t_old / t_new:4.1f}x)   cues differing: {diff}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+# scripts/bench_dedupe.py
+# Segment-count reduction and runtime of dedupe.py vs the old exact (round(start), text.lower())
+# key, on the local caption corpus (SRT_DIR, default srt/) merged with a synthetic VTT copy of it:
+# starts shifted by up to +/-1.5s, punctuation/case changed, and some cues re-segmented
+# (two cues merged into one, or one split in two), the way auto captions differ from manual ones.
+# Also reports how many lines each caption file loses when deduped on its own, which should only
+# be exact repeats: near-duplicate rules apply across sources, never within one.
+#
+#   SRT_DIR=srt REPEAT=20 python scripts/bench_dedupe.py
+
+import os, sys, re, time, random
+from captions import CaptionCatalog, parse_caption_file
+from dedupe import dedupe
+
+SRT_DIR = os.getenv("SRT_DIR", "srt")
+REPEAT  = int(os.getenv("REPEAT", "20"))
+WINDOW  = float(os.getenv("DEDUPE_WINDOW", "2"))
+SIM     = float(os.getenv("DEDUPE_SIM", "0.8"))
+SOURCE_RANK = {"srt": 3, "transcript": 2, "chapters": 1, "title": 0.2, "description": 0.1}
+
+def legacy_dedupe(segs):
+    seen = {}
+    for s in sorted(segs, key=lambda x: (-SOURCE_RANK.get(x["src"], 0), x["start"])):
+        key = (int(round(s["start"])), s["text"].lower())
+        if key in seen:
+            continue
+        seen[key] = s
+    return list(seen.values())
+
+def vtt_copy(segs, rnd):
+    out, i = [], 0
+    def seg(start, text):
+        text = re.sub(r"[.,!?]", "", text) if rnd.random() < 0.5 else text.upper() if rnd.random() < 0.1 else text
+        return {"start": max(0, round(start + rnd.uniform(-1.5, 1.5))), "text": text, "norm": text.lower(), "src": "transcript"}
+    while i < len(segs):
+        s, r = segs[i], rnd.random()
+        if r < 0.15 and i + 1 < len(segs):        # merged with the next cue
+            out.append(seg(s["start"], s["text"] + " " + segs[i + 1]["text"])); i += 2; continue
+        w = s["text"].split()
+        if r < 0.3 and len(w) >= 8:               # split in two
+            out.append(seg(s["start"], " ".join(w[:len(w) // 2])))
+            out.append(seg(s["start"] + 1, " ".join(w[len(w) // 2:])))
+        else:
+            out.append(seg(s["start"], s["text"]))
+        i += 1
+    return out
+
+def main():
+    rnd = random.Random(1)
+    catalog = CaptionCatalog(SRT_DIR)
+    videos = []
+    for vid in catalog:
+        srt_segs = parse_caption_file(catalog.best(vid))
+        for _ in range(REPEAT):
+            videos.append(srt_segs + vtt_copy(srt_segs, rnd))
+    n_srt = sum(1 for v in videos for s in v if s["src"] == "srt")
+    n_in = sum(len(v) for v in videos)
+
+    for name, fn in (("legacy exact key", legacy_dedupe),
+                     (f"window={WINDOW:g}s sim={SIM:g}", lambda v: dedupe(v, SOURCE_RANK, WINDOW, SIM))):
+        t0 = time.perf_counter()
+        out = [fn(v) for v in videos]
+        dt = time.perf_counter() - t0
+        n_out = sum(len(v) for v in out)
+        n_tr = sum(1 for v in out for s in v if s["src"] == "transcript")
+        print(f"  {name:<24} {n_in} -> {n_out} segments ({100 * (1 - n_out / n_in):4.1f}% removed, "
+              f"{n_tr} transcript left)  {dt * 1000:8.1f} ms  ({dt / n_in * 1e6:.2f} us/segment)")
+    print(f"corpus: {len(catalog)} caption files x{REPEAT}; {n_srt} srt + {n_in - n_srt} synthetic VTT segments")
+
+    files = [parse_caption_file(catalog.best(vid)) for vid in catalog]
+    lost = []
+    for segs in files:
+        kept = {id(s) for s in dedupe(segs, SOURCE_RANK, WINDOW, SIM)}
+        lost.extend((s["start"], s["text"]) for s in segs if id(s) not in kept)
+    print(f"  caption files alone: {sum(len(f) for f in files)} lines, {len(lost)} dropped" +
+          "".join(f"\n    {start:9.3f}  {text!r}" for start, text in lost[:10]))
+
+if __name__ == "__main__":
+    sys.exit(main())
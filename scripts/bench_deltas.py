@@ -0,0 +1,98 @@
+# scripts/bench_deltas.py
+# Bytes a client transfers per index update: re-downloading index.json vs DeltaLoader applying
+# deltas/ to its cached copy. Starts from INDEX_PATH (default public/index.json) and simulates
+# BENCH_UPDATES builds, each adding BENCH_ADD videos, changing BENCH_CHANGE and removing one every
+# 4th build; clients check after every build, or only every BENCH_LAG builds. gz columns are the
+# gzip sizes (what a server with compression sends). Also checks every client ends up with the
+# published index.
+#
+#   BENCH_UPDATES=20 BENCH_ADD=1 BENCH_CHANGE=1 BENCH_LAG=5 python scripts/bench_deltas.py
+
+import os, sys, copy, gzip, json, random, tempfile
+
+os.environ["DELTAS"] = "1"  # index_io reads it at import
+from index_io import publish
+from index_deltas import DeltaLoader
+
+INDEX_PATH = os.getenv("INDEX_PATH", "public/index.json")
+UPDATES    = int(os.getenv("BENCH_UPDATES", "20"))
+ADD        = int(os.getenv("BENCH_ADD", "1"))
+CHANGE     = int(os.getenv("BENCH_CHANGE", "1"))
+LAG        = int(os.getenv("BENCH_LAG", "5"))
+
+class GzipCounting(DeltaLoader):
+    """DeltaLoader that also counts the gzip size of what it fetched."""
+    gz = 0
+    def _fetch(self, rel):
+        with open(os.path.join(self.base, rel), "rb") as f:
+            self.gz += len(gzip.compress(f.read(), 6))
+        return super()._fetch(rel)
+
+def canonical(index):
+    by_vid = {}
+    for s in index["segments"]:
+        by_vid.setdefault(s["video_id"], []).append(s)
+    return ({k: v for k, v in index.items() if k not in ("videos", "segments")},
+            sorted((json.dumps(v, sort_keys=True), json.dumps(by_vid.get(v["id"], []), sort_keys=True)) for v in index["videos"]))
+
+def mutate(index, gen, rnd):
+    index = copy.deepcopy(index)
+    index["generated_at"] += 3600 * 6
+    by_vid = {}
+    for s in index["segments"]:
+        by_vid.setdefault(s["video_id"], []).append(s)
+    for i in range(ADD):  # a new upload: some existing video's captions under a new id
+        src = rnd.choice(index["videos"])
+        vid = f"new{gen:04d}{i:03d}"
+        index["videos"].insert(0, {**src, "id": vid, "url": f"https://youtu.be/{vid}"})
+        by_vid[vid] = [{**s, "video_id": vid} for s in by_vid.get(src["id"], [])]
+    for v in rnd.sample(index["videos"], CHANGE):  # e.g. a description edit or a new caption track
+        text = f"edited in build {gen}"
+        by_vid.setdefault(v["id"], []).append({"start": 0, "text": text, "norm": text.lower(), "src": "description", "video_id": v["id"]})
+    if gen % 4 == 0:
+        gone = index["videos"].pop(rnd.randrange(len(index["videos"])))
+        by_vid.pop(gone["id"], None)
+    index["segments"] = [s for v in index["videos"] for s in by_vid.get(v["id"], [])]
+    return index
+
+def main():
+    with open(INDEX_PATH, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    rnd = random.Random(1)
+    with tempfile.TemporaryDirectory() as root:
+        public = os.path.join(root, "public")
+        path = os.path.join(public, "index.json")
+        publish(index, path)
+        clients = {"every build": GzipCounting(public, os.path.join(root, "c1.json")),
+                   f"every {LAG} builds": GzipCounting(public, os.path.join(root, "c2.json"))}
+        for c in clients.values():
+            c.load()
+            c.bytes = c.gz = 0
+        full = {name: [0, 0] for name in clients}  # bytes, gz of fetching index.json instead
+        checks = {name: 0 for name in clients}
+        for gen in range(1, UPDATES + 1):
+            index = mutate(index, gen, rnd)
+            publish(index, path)
+            with open(path, "rb") as f:
+                data = f.read()
+            for name, c in clients.items():
+                if name != "every build" and gen % LAG:
+                    continue
+                if canonical(c.load()) != canonical(index):
+                    raise SystemExit(f"❌ {name}: client copy differs from the published index after build {gen}")
+                full[name][0] += len(data); full[name][1] += len(gzip.compress(data, 6))
+                checks[name] += 1
+        with open(os.path.join(public, "deltas", "manifest.json"), "r", encoding="utf-8") as f:
+            chain = json.load(f)["deltas"]
+
+    print(f"{INDEX_PATH}: {len(index['videos'])} videos, {len(data) / 1024:.0f} KiB; {UPDATES} builds "
+          f"(+{ADD} / ~{CHANGE} videos each, -1 every 4th); manifest keeps {len(chain)} deltas")
+    for name, c in clients.items():
+        n = checks[name]
+        print(f"  client checking {name:<16} full: {full[name][0] / n / 1024:8.1f} KiB ({full[name][1] / n / 1024:6.1f} gz)"
+              f"   deltas: {c.bytes / n / 1024:7.1f} KiB ({c.gz / n / 1024:5.1f} gz)   per update, {n} updates"
+              f"   ({full[name][0] / c.bytes:.0f}x less)")
+    print("✅ all clients match the published index")
+
+if __name__ == "__main__":
+    sys.exit(main())
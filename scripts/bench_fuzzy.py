@@ -0,0 +1,75 @@
+# scripts/bench_fuzzy.py
+# Fuzzy term lookup latency (term_dict.TermDictionary) vs vocabulary size, against scanning the
+# whole vocabulary with the same edit distance. The vocabulary of INDEX_PATH is padded up to each
+# of BENCH_VOCAB with new words (head of one term + tail of another) and ASR-style misspellings of
+# its own terms, half each; queries are vocabulary terms with one or two random edits
+# (insert/delete/substitute/transpose). "closest" is the lookup search does (only the nearest
+# spellings), "all" lists every term within the edit limit.
+#
+#   INDEX_PATH=public/index.json BENCH_VOCAB=2500,10000,50000,100000 QUERIES=300 python scripts/bench_fuzzy.py
+
+import os, sys, json, time, random
+from inverted_index import InvertedIndex
+from term_dict import TermDictionary, edit_distance
+from ranking import fuzzy_edits
+
+INDEX_PATH = os.getenv("INDEX_PATH", "public/index.json")
+VOCAB      = [int(x) for x in os.getenv("BENCH_VOCAB", "2500,10000,50000,100000").split(",")]
+QUERIES    = int(os.getenv("QUERIES", "300"))
+LETTERS    = "abcdefghijklmnopqrstuvwxyz"
+
+def typo(word, rnd, edits):
+    w = list(word)
+    for _ in range(edits):
+        op, i = rnd.randrange(4), rnd.randrange(len(w))
+        if op == 0:
+            w.insert(i, rnd.choice(LETTERS))
+        elif op == 1 and len(w) > 1:
+            del w[i]
+        elif op == 2 and i + 1 < len(w):
+            w[i], w[i + 1] = w[i + 1], w[i]
+        else:
+            w[i] = rnd.choice(LETTERS)
+    return "".join(w)
+
+def pct(xs, p):
+    return sorted(xs)[min(len(xs) - 1, int(len(xs) * p))]
+
+def main():
+    with open(INDEX_PATH, "r", encoding="utf-8") as f:
+        base = InvertedIndex.from_segments(json.load(f)["segments"]).vocab
+    words = [t for t in base if len(t) >= 3 and t.isalpha()]
+    rnd = random.Random(1)
+    print(f"{INDEX_PATH}: {len(base)} terms; {QUERIES} typo queries (1 edit for 3-5 letters, else up to 2)")
+    print(f"{'vocab':>8} {'build ms':>9} {'closest p50/p99 ms':>19} {'all p50/p99 ms':>15} {'scan ms':>8} {'hits/q':>7}")
+    for size in VOCAB:
+        vocab = set(base)
+        while len(vocab) < size:
+            if rnd.random() < 0.5:
+                a, b = rnd.choice(words), rnd.choice(words)
+                vocab.add(a[:rnd.randint(2, len(a))] + b[rnd.randint(1, len(b) - 1):])
+            else:
+                vocab.add(typo(rnd.choice(words), rnd, rnd.randint(1, 2)))
+        vocab = sorted(vocab)
+        t0 = time.perf_counter()
+        d = TermDictionary(vocab)
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        queries = [typo(w, rnd, 1 if len(w) <= 5 else rnd.randint(1, 2)) for w in rnd.choices(words, k=QUERIES)]
+        times, hits = {True: [], False: []}, 0
+        for closest in (True, False):
+            for q in queries:
+                t0 = time.perf_counter()
+                n = len(d.fuzzy(q, fuzzy_edits(q), closest))
+                times[closest].append((time.perf_counter() - t0) * 1000)
+                hits += 0 if closest else n
+        t0 = time.perf_counter()
+        for q in queries[:20]:
+            k = fuzzy_edits(q)
+            [t for t in vocab if abs(len(t) - len(q)) <= k and edit_distance(q, t) <= k]
+        scan_ms = (time.perf_counter() - t0) / 20 * 1000
+        print(f"{len(vocab):8d} {build_ms:9.1f} {pct(times[True], 0.5):10.2f} /{pct(times[True], 0.99):6.2f} "
+              f"{pct(times[False], 0.5):7.2f} /{pct(times[False], 0.99):6.2f} {scan_ms:8.1f} {hits / QUERIES:7.1f}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+# scripts/bench_inverted_index.py
+# Compares inverted-index lookups against the linear scan over segments[].norm that
+# clients do today. Runs on public/index.json (or INDEX_PATH), optionally replicated
+# REPEAT times to simulate a bigger channel.
+#
+# Note: the linear scan is substring matching, the index matches whole tokens/prefixes,
+# so hit counts can differ slightly ("fader" also matches "faders" as a substring).
+# "rank term"/"rank phr" are the full ranking.py scoring (BM25 + windows + proximity) of the
+# term and phrase queries. The phrases are random two-word spans of the captions, so most pair
+# stopwords ("to the", "in this"): the ranker's worst case, since their postings are long.
+
+import os, sys, json, time, random
+from inverted_index import InvertedIndex, tokenize
+from ranking import Ranker
+
+INDEX_PATH = os.getenv("INDEX_PATH", "public/index.json")
+REPEAT     = int(os.getenv("REPEAT", "1"))
+QUERIES    = int(os.getenv("QUERIES", "200"))
+
+def timed(fn, qs):
+    t0 = time.perf_counter()
+    hits = sum(len(fn(q)) for q in qs)
+    return (time.perf_counter() - t0) / len(qs) * 1e6, hits
+
+def main():
+    with open(INDEX_PATH, "r", encoding="utf-8") as f:
+        segments = json.load(f)["segments"] * REPEAT
+    t0 = time.perf_counter()
+    idx = InvertedIndex.from_segments(segments)
+    build_s = time.perf_counter() - t0
+
+    rnd = random.Random(1)
+    vocab = [t for t in idx.vocab if len(t) > 3]
+    terms = [rnd.choice(vocab) for _ in range(QUERIES)]
+    prefixes = [t[:3] for t in terms]
+    phrases = []
+    while len(phrases) < QUERIES:
+        toks = tokenize(rnd.choice(segments)["norm"])
+        if len(toks) >= 3:
+            i = rnd.randrange(len(toks) - 1)
+            phrases.append(" ".join(toks[i:i + 2]))
+
+    linear = lambda q: [i for i, s in enumerate(segments) if q in s["norm"]]
+    print(f"segments={len(segments)} terms={len(idx.vocab)} index_build={build_s*1000:.1f}ms")
+    print(f"{'query':8} {'linear us':>12} {'index us':>12} {'speedup':>8}")
+    ranker = Ranker(idx, segments)
+    for name, qs, fn in (("term", terms, idx.term), ("prefix", prefixes, idx.prefix), ("phrase", phrases, idx.phrase),
+                         ("rank term", terms, lambda q: ranker.rank([q])),
+                         ("rank phr", phrases, lambda q: ranker.rank(q.split()))):
+        lin_us, _ = timed(linear, qs)
+        idx_us, _ = timed(fn, qs)
+        print(f"{name:8} {lin_us:12.1f} {idx_us:12.1f} {lin_us/idx_us:7.1f}x")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+# scripts/bench_memory.py
+# Peak RSS of writing index.json for a synthetic channel: the old "collect lists, then json.dump"
+# approach vs index_io.IndexWriter (with and without the inverted.json postings it also builds).
+# Each measurement runs in a fresh child process.
+# Then the whole builder (build_index_from_api_transcripts.py, thread and async pipelines) against
+# fake_youtube.py for BENCH_BUILDER_VIDEOS videos, peak RSS from its PROFILE=1 report: it should
+# stay flat as the channel grows.
+#
+#   BENCH_SIZES=1000,5000,10000 BENCH_SEGS=40 BENCH_BUILDER_VIDEOS=100,400,1200 python scripts/bench_memory.py
+
+import os, sys, json, time, random, resource, subprocess, tempfile
+from fake_youtube import spawn
+
+SIZES = [int(x) for x in os.getenv("BENCH_SIZES", "1000,5000,10000").split(",") if x]
+SEGS  = int(os.getenv("BENCH_SEGS", "40"))
+BUILDER_VIDEOS = [int(x) for x in os.getenv("BENCH_BUILDER_VIDEOS", "100,400,1200").split(",") if x]
+BUILDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "build_index_from_api_transcripts.py")
+WORDS = "fader page cue sequence fixture patch dmx lighting blackout capture scene color intensity".split()
+
+def synthetic_videos(n):
+    rnd = random.Random(n)
+    for i in range(n):
+        vid = f"v{i:010d}"
+        segs = []
+        for j in range(SEGS):
+            text = " ".join(rnd.choices(WORDS, k=8))
+            segs.append({"start": j * 3, "text": text, "norm": text.lower(), "src": "srt", "video_id": vid})
+        yield {"id": vid, "title": f"Video {i}", "url": f"https://youtu.be/{vid}"}, segs
+
+def child(mode, n, out_dir):
+    path = os.path.join(out_dir, "index.json")
+    if mode == "lists + json.dump":
+        videos, segments = [], []
+        for v, segs in synthetic_videos(n):
+            videos.append(v); segments.extend(segs)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"generated_at": 0, "videos": videos, "segments": segments}, f, ensure_ascii=False)
+    else:
+        from index_io import IndexWriter
+        with IndexWriter(path, {"generated_at": 0}) as w:
+            for v, segs in synthetic_videos(n):
+                w.add(v, segs)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB -> MiB on Linux
+
+def main():
+    if len(sys.argv) == 4:
+        t0 = time.perf_counter()
+        peak = child(sys.argv[1], int(sys.argv[2]), sys.argv[3])
+        print(f"{peak:.1f} {time.perf_counter() - t0:.2f}")
+        return
+    modes = [("lists + json.dump", {}), ("IndexWriter, INVERTED=0", {"INVERTED": "0"}),
+             ("IndexWriter + inverted.json", {"INVERTED": "1"})]
+    print(f"segments/video={SEGS}; peak RSS MiB (wall s)")
+    print(f"{'videos':>8} " + " ".join(f"{m:>30}" for m, _ in modes))
+    for n in SIZES:
+        row = []
+        for mode, env in modes:
+            with tempfile.TemporaryDirectory() as d:
+                out = subprocess.run([sys.executable, os.path.abspath(__file__), mode, str(n), d],
+                                     env={**os.environ, **env}, capture_output=True, text=True, check=True).stdout
+            peak, secs = out.split()
+            row.append(f"{peak:>21} ({secs:>5}s)")
+        print(f"{n:>8} " + " ".join(f"{r:>30}" for r in row))
+    if BUILDER_VIDEOS:
+        builder()
+
+def builder():
+    modes = [("threads", {}), ("async", {"ASYNC": "1"})]
+    print(f"\nbuild_index_from_api_transcripts.py vs fake_youtube.py (120 cues/video); peak RSS MiB (wall s)")
+    print(f"{'videos':>8} " + " ".join(f"{m:>20}" for m, _ in modes))
+    for n in BUILDER_VIDEOS:
+        server, server_env = spawn(n, 120)
+        try:
+            row = []
+            for mode, extra in modes:
+                with tempfile.TemporaryDirectory() as d:
+                    env = {**os.environ, **server_env, **extra, "PROFILE": "1", "PROFILE_PATH": os.path.join(d, "profile.json"),
+                           "HTTP_RATE": "0", "YOUTUBE_API_KEY": "bench", "SRT_DIR": os.path.join(d, "none"), "PARSE_PROCS": "0"}
+                    env.pop("HTTP_CACHE_DIR", None)
+                    subprocess.run([sys.executable, BUILDER], cwd=d, env=env, capture_output=True, check=True)
+                    with open(env["PROFILE_PATH"], "r", encoding="utf-8") as f:
+                        report = json.load(f)
+                row.append(f"{report['peak_rss_mb']:>11} ({report['wall_s']:>5.2f}s)")
+            print(f"{n:>8} " + " ".join(f"{r:>20}" for r in row))
+        finally:
+            server.terminate()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+# scripts/bench_parse_pool.py
+# Scaling of parse_pool.parse_files() over worker processes, on a synthetic caption tree of
+# BENCH_FILES files (.sbv/.srt/.vtt renderings of the srt/ corpus), plus the cost of shipping
+# results back as lists of dicts vs the packed column form.
+#
+#   BENCH_FILES=3000 BENCH_PROCS=1,2,4,8 python scripts/bench_parse_pool.py
+
+import os, sys, time, pickle, random, tempfile
+from captions import CaptionCatalog, parse_caption_file
+from parse_pool import parse_files, pool, pack, unpack, PARSE_BATCH
+from fake_youtube import RENDERERS
+
+SRT_DIR = os.getenv("SRT_DIR", "srt")
+FILES   = int(os.getenv("BENCH_FILES", "3000"))
+PROCS   = sorted({int(x) for x in os.getenv("BENCH_PROCS", f"1,2,4,{os.cpu_count() or 1}").split(",")})
+
+def make_tree(root):
+    catalog = CaptionCatalog(SRT_DIR)
+    corpus = [[(s["start"], s["text"]) for s in parse_caption_file(catalog.best(v))] for v in catalog]
+    rnd, items = random.Random(1), []
+    for i in range(FILES):
+        vid, ext = f"f{i:010d}", (".sbv", ".srt", ".vtt")[i % 3]
+        cues = corpus[i % len(corpus)]
+        path = os.path.join(root, vid + ext)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(RENDERERS[ext[1:]]([(s + rnd.randint(0, 3), t) for s, t in cues], dur=2))
+        items.append((vid, path, "srt"))
+    return items
+
+def timed(items, ex):
+    t0 = time.perf_counter()
+    n = sum(len(segs) for _, segs in parse_files(items, ex))
+    return time.perf_counter() - t0, n
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        items = make_tree(root)
+        base, n = timed(items, None)
+        print(f"{FILES} files, {n} segments, {os.cpu_count()} CPUs, batch={PARSE_BATCH}")
+        print(f"  in-process        {base:6.2f}s")
+        for procs in PROCS:
+            ex = pool(procs)
+            timed(items[:procs * PARSE_BATCH], ex)  # start the workers outside the timing
+            dt, _ = timed(items, ex)
+            ex.shutdown()
+            print(f"  PARSE_PROCS={procs:<4} {dt:6.2f}s  ({base / dt:4.2f}x)")
+
+        # transport cost of one batch of results
+        batch = [parse_caption_file(p, src) for _, p, src in items[:PARSE_BATCH]]
+        for name, obj, back in (("list of dicts", batch, lambda b: b),
+                                ("packed columns", [pack(s) for s in batch], lambda b: [unpack(p, "x") for p in b])):
+            t0 = time.perf_counter()
+            for _ in range(20):
+                back(pickle.loads(data := pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)))
+            print(f"  {name:<15} {len(data) / 1024:8.1f} KiB/batch   pickle+unpickle {(time.perf_counter() - t0) / 20 * 1000:6.2f} ms/batch")
+
+if __name__ == "__main__":
+    sys.exit(main())
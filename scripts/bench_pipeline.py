@@ -0,0 +1,54 @@
+# scripts/bench_pipeline.py
+# Thread-pool vs async pipeline for build_index_from_api_transcripts.py against a local
+# fake YouTube (fake_youtube.py, run in a child process) with injected latency.
+# Times the per-video stage only (track discovery, VTT download, parse/dedupe).
+#
+#   BENCH_VIDEOS=300 BENCH_LATENCY=0.05 WORKERS=8 python scripts/bench_pipeline.py
+
+import os, sys, time, asyncio, tempfile
+from fake_youtube import spawn
+
+VIDEOS  = int(os.getenv("BENCH_VIDEOS", "200"))
+LATENCY = float(os.getenv("BENCH_LATENCY", "0.05"))
+CUES    = int(os.getenv("BENCH_CUES", "200"))
+
+def main():
+    server, server_env = spawn(VIDEOS, CUES, LATENCY)
+    tmp = tempfile.mkdtemp()
+    # builder + http_client read their config at import time
+    os.environ.update(server_env)
+    os.environ.setdefault("YOUTUBE_API_KEY", "bench")
+    os.environ.update({"HTTP_RATE": "0", "SRT_DIR": tmp})
+    import build_index_from_api_transcripts as b
+
+    # listing + videos.list batches are shared by both modes; time only the per-video pipeline
+    b.caption_catalog()
+    vids = b.list_uploads(b.uploads_playlist_id())
+    snippets = b.fetch_snippets([v["id"] for v in vids])
+
+    w = b.WORKERS
+    runs = [
+        (f"threads WORKERS={w}", dict(ASYNC=False)),
+        (f"async {w//2}/{w//2}/{b.PARSE_WORKERS} (same in-flight requests)",
+         dict(ASYNC=True, TRACK_WORKERS=max(1, w//2), DOWNLOAD_WORKERS=max(1, w//2))),
+        (f"async {w}/{w}/{b.PARSE_WORKERS}", dict(ASYNC=True, TRACK_WORKERS=w, DOWNLOAD_WORKERS=w)),
+    ]
+    print(f"videos={VIDEOS} cues/video={CUES} latency={LATENCY*1000:.0f}ms")
+    results = {}
+    for name, cfg in runs:
+        for k, v in cfg.items():
+            setattr(b, k, v)
+        segs = []
+        on_result = lambda v, s: segs.extend(s)
+        t0 = time.perf_counter()
+        if b.ASYNC:
+            asyncio.run(b.run_async(vids, snippets, on_result))
+        else:
+            b.run_threads(vids, snippets, on_result)
+        results[name] = time.perf_counter() - t0
+        base = results[runs[0][0]]
+        print(f"  {name:<45} {results[name]:7.2f}s  ({base/results[name]:.2f}x)  segs:{len(segs)}")
+    server.terminate()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+# scripts/bench_search_server.py
+# Load test for search_server.py: starts it in a child process on INDEX_PATH and fires
+# REQUESTS queries from CONCURRENCY client threads, once with the result cache disabled and
+# once with it enabled. Queries are drawn Zipf-like from the index vocabulary (single terms,
+# two-word phrases, prefixes), so popular queries repeat the way real traffic does.
+#
+#   INDEX_PATH=public/index.json REQUESTS=3000 CONCURRENCY=8 python scripts/bench_search_server.py
+
+import os, sys, json, time, random, threading, subprocess
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from inverted_index import tokenize
+
+INDEX_PATH  = os.getenv("INDEX_PATH", "public/index.json")
+REQUESTS    = int(os.getenv("REQUESTS", "3000"))
+CONCURRENCY = int(os.getenv("CONCURRENCY", "8"))
+DISTINCT    = int(os.getenv("DISTINCT", "300"))
+
+def make_queries():
+    with open(INDEX_PATH, "r", encoding="utf-8") as f:
+        segments = json.load(f)["segments"]
+    rnd = random.Random(1)
+    toks = [tokenize(s.get("norm") or s["text"]) for s in segments]
+    toks = [t for t in toks if len(t) >= 2]
+    pool = []
+    for _ in range(DISTINCT):
+        t = rnd.choice(toks)
+        kind = rnd.random()
+        if kind < 0.5:
+            pool.append(rnd.choice(t))
+        elif kind < 0.8:
+            i = rnd.randrange(len(t) - 1)
+            pool.append(f"{t[i]} {t[i + 1]}")
+        else:
+            pool.append(rnd.choice(t)[:3] + "*")
+    weights = [1 / (i + 1) for i in range(len(pool))]
+    return rnd.choices(pool, weights, k=REQUESTS)
+
+def start_server(cache):
+    env = {**os.environ, "INDEX_PATH": INDEX_PATH, "SEARCH_PORT": "0", "SEARCH_CACHE": str(cache)}
+    proc = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "search_server.py")],
+                            env=env, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    return proc, line.split(" on ", 1)[1].split("/search")[0].strip()
+
+def run(base, queries):
+    local = threading.local()
+    def one(q):
+        s = getattr(local, "s", None) or setattr(local, "s", requests.Session()) or local.s
+        t0 = time.perf_counter()
+        r = s.get(f"{base}/search", params={"q": q, "limit": 10})
+        r.raise_for_status()
+        return time.perf_counter() - t0
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(CONCURRENCY) as ex:
+        lat = sorted(ex.map(one, queries))
+    wall = time.perf_counter() - t0
+    pct = lambda p: lat[min(len(lat) - 1, int(p / 100 * len(lat)))] * 1000
+    return pct(50), pct(99), len(lat) / wall
+
+def main():
+    queries = make_queries()
+    print(f"{INDEX_PATH}: {REQUESTS} requests, {len(set(queries))} distinct queries, concurrency {CONCURRENCY}")
+    for name, cache in (("no cache", 0), ("LRU cache", 1024)):
+        proc, base = start_server(cache)
+        try:
+            run(base, queries[:50])  # warm up connections
+            p50, p99, qps = run(base, queries)
+            stats = requests.get(f"{base}/stats").json()["cache"]
+        finally:
+            proc.terminate(); proc.wait()
+        print(f"  {name:<10} p50 {p50:7.2f} ms   p99 {p99:7.2f} ms   {qps:8.0f} QPS   cache hits {stats['hits']}/{stats['hits'] + stats['misses']}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+# scripts/bench_segment_store.py
+# Size and load-time of segments as index.json-style JSON vs segments.bin, on the local
+# caption corpus (SRT_DIR, default srt/). REPEAT replicates the corpus to simulate a larger channel.
+
+import os, sys, json, time, tempfile
+from captions import CaptionCatalog, parse_caption_file
+from segment_store import write_segment_store, SegmentStore
+
+SRT_DIR = os.getenv("SRT_DIR", "srt")
+REPEAT  = int(os.getenv("REPEAT", "1"))
+RUNS    = int(os.getenv("RUNS", "5"))
+
+def best_of(fn):
+    best = float("inf")
+    for _ in range(RUNS):
+        t0 = time.perf_counter(); fn(); best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+def main():
+    catalog = CaptionCatalog(SRT_DIR)
+    ids = list(catalog)
+    segments = []
+    for r in range(REPEAT):
+        for vid in ids:
+            for s in parse_caption_file(catalog.best(vid)):
+                s["video_id"] = vid if r == 0 else f"{vid}~{r}"
+                segments.append(s)
+    out = {"generated_at": int(time.time()), "segments": segments}
+
+    with tempfile.TemporaryDirectory() as d:
+        jpath, bpath = os.path.join(d, "index.json"), os.path.join(d, "segments.bin")
+        with open(jpath, "w", encoding="utf-8") as f:
+            json.dump(out, f, ensure_ascii=False)
+        write_segment_store(out, bpath)
+        jsize, bsize = os.path.getsize(jpath), os.path.getsize(bpath)
+
+        def load_json():
+            with open(jpath, "r", encoding="utf-8") as f:
+                json.load(f)
+        def open_bin():
+            SegmentStore(bpath).close()
+        def full_bin():
+            with SegmentStore(bpath) as st:
+                list(st)
+
+        tj, to, tf = best_of(load_json), best_of(open_bin), best_of(full_bin)
+        print(f"corpus: {len(ids)} caption files x{REPEAT}, {len(segments)} segments")
+        print(f"size     json {jsize/1024:9.1f} KiB   bin {bsize/1024:9.1f} KiB   ({100*(1-bsize/jsize):.0f}% smaller)")
+        print(f"load     json {tj:9.2f} ms    bin open {to:9.2f} ms   bin all rows {tf:9.2f} ms")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+# scripts/bench_semantic.py
+# Vector search (semantic.py) costs: embedding throughput, what an incremental rebuild re-embeds,
+# and query latency of the exact scan vs LSH as the number of windows grows, with LSH recall@10
+# against the exact top 10. Larger corpora repeat INDEX_PATH's videos with a word or two of each
+# window perturbed, so the vectors are not duplicates. Queries are windows' own text, cut short.
+#
+#   INDEX_PATH=public/index.json BENCH_WINDOWS=20000,100000,300000 QUERIES=200 python scripts/bench_semantic.py
+
+import os, sys, json, time, random, tempfile
+
+os.environ["EMBED"] = "1"  # index_io reads it at import
+from index_io import publish
+import semantic
+from semantic import np, HashingEmbedder, VectorIndex, windows
+
+INDEX_PATH = os.getenv("INDEX_PATH", "public/index.json")
+SIZES      = [int(x) for x in os.getenv("BENCH_WINDOWS", "20000,100000,300000").split(",")]
+QUERIES    = int(os.getenv("QUERIES", "200"))
+
+def pct(xs, p):
+    return sorted(xs)[min(len(xs) - 1, int(len(xs) * p))]
+
+def main():
+    if np is None:
+        raise SystemExit("❌ numpy is required")
+    with open(INDEX_PATH, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    by_vid = {}
+    for s in index["segments"]:
+        by_vid.setdefault(s["video_id"], []).append(s)
+    texts = [" ".join(s["text"] for s in segs[a:a + n]) for segs in by_vid.values() for a, n in windows(segs)]
+    print(f"{INDEX_PATH}: {len(index['videos'])} videos, {len(index['segments'])} segments, {len(texts)} windows")
+
+    emb = HashingEmbedder()
+    t0 = time.perf_counter()
+    base = emb.embed(texts)
+    dt = time.perf_counter() - t0
+    print(f"embed: {len(texts) / dt:,.0f} windows/s ({dt * 1000:.0f} ms; {base.nbytes / 1024:.0f} KiB float16)")
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "public", "index.json")
+        for label, edit in (("full build", None), ("rebuild, unchanged", 0), ("rebuild, 3 videos changed", 3)):
+            if edit:
+                index["generated_at"] += 3600
+                for v in index["videos"][:edit]:
+                    by_vid[v["id"]][0]["text"] += " edited"
+                index["segments"] = [s for v in index["videos"] for s in by_vid.get(v["id"], [])]
+            print(f"{label}:")
+            t0 = time.perf_counter()
+            publish(index, path)
+            print(f"   {(time.perf_counter() - t0) * 1000:.0f} ms for the whole publish")
+
+    rnd = random.Random(1)
+    words = [w for t in texts for w in t.split()]
+    queries = [" ".join(t.split()[:rnd.randint(2, 6)]) for t in rnd.choices(texts, k=QUERIES)]
+    print(f"{'windows':>8} {'exact p50/p99 ms':>17} {'lsh p50/p99 ms':>15} {'shortlist':>10} {'recall@10':>10}")
+    for size in SIZES:
+        chunks, rows = [base], len(base)
+        while rows < size:
+            t = [" ".join(rnd.choice(words) if rnd.random() < 0.15 else w for w in x.split()) for x in texts]
+            chunks.append(emb.embed(t[:size - rows]))
+            rows += len(chunks[-1])
+        vecs = np.concatenate(chunks)[:size]
+        videos = {"all": {"row": 0, "seg_start": 0, "windows": [[i, 1] for i in range(len(vecs))]}}
+        semantic.ANN_MIN = 0
+        ann = VectorIndex(vecs, videos)
+        exact = VectorIndex.__new__(VectorIndex)
+        exact.__dict__.update(ann.__dict__, tables=None)
+        times, recall, shortlist = {"exact": [], "lsh": []}, [], []
+        for q in queries:
+            got = {}
+            for name, idx in (("exact", exact), ("lsh", ann)):
+                t0 = time.perf_counter()
+                got[name] = {s for s, _, _ in idx.search(q, 10)}
+                times[name].append((time.perf_counter() - t0) * 1000)
+            if got["exact"]:
+                recall.append(len(got["exact"] & got["lsh"]) / len(got["exact"]))
+            shortlist.append(len(ann.candidates(emb.embed([q])[0].astype(np.float32))))
+        print(f"{len(vecs):8d} {pct(times['exact'], 0.5):8.2f} /{pct(times['exact'], 0.99):6.2f} "
+              f"{pct(times['lsh'], 0.5):7.2f} /{pct(times['lsh'], 0.99):6.2f} {sum(shortlist) / len(shortlist):10.0f} "
+              f"{sum(recall) / len(recall):10.2f}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# scripts/bench_validate.py
+# Cost of the publish gate (validate_index.py) as the index grows: INDEX_PATH's videos repeated
+# BENCH_SCALE times under new ids. "inline" is what IndexWriter adds to a publish (checks fed as it
+# writes, plus the previous index's counts from index.stats.json); "stream" is the standalone
+# check of the written file, and "json.load" parsing it whole for comparison.
+#
+#   INDEX_PATH=public/index.json BENCH_SCALE=1,10,60 python scripts/bench_validate.py
+
+import os, sys, json, time, tempfile
+from validate_index import Checker, check, gate, previous_stats
+
+INDEX_PATH = os.getenv("INDEX_PATH", "public/index.json")
+SCALES     = [int(x) for x in os.getenv("BENCH_SCALE", "1,10,60").split(",")]
+
+def scaled(index, n):
+    out = {k: v for k, v in index.items() if k not in ("videos", "segments")}
+    out["videos"] = [{**v, "id": f"{v['id']}~{r}"} for r in range(n) for v in index["videos"]]
+    out["segments"] = [{**s, "video_id": f"{s['video_id']}~{r}"} for r in range(n) for s in index["segments"]]
+    return out
+
+def main():
+    with open(INDEX_PATH, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    print(f"{'scale':>6} {'segments':>9} {'MiB':>7} {'inline ms':>10} {'stream ms':>10} {'json.load ms':>13}")
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "index.json")
+        for n in SCALES:
+            big = scaled(index, n)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(big, f, ensure_ascii=False)
+            size = os.path.getsize(path)
+            stats, _ = check(path)
+            with open(path[:-5] + ".stats.json", "w", encoding="utf-8") as f:
+                json.dump(stats, f)
+
+            t0 = time.perf_counter()
+            c = Checker()
+            for k, v in big.items():
+                if k == "segments":
+                    for s in v:
+                        c.segment(s)
+                elif k == "videos":
+                    for vid in v:
+                        c.video(vid)
+                c.key(k, [] if k in ("videos", "segments") else v)
+            gate(path, *c.finish(size), path)
+            inline = (time.perf_counter() - t0) * 1000
+
+            t0 = time.perf_counter()
+            _, errors = check(path)
+            stream = (time.perf_counter() - t0) * 1000
+            if errors:
+                raise SystemExit(f"❌ {errors}")
+            t0 = time.perf_counter()
+            with open(path, "r", encoding="utf-8") as f:
+                json.load(f)
+            load = (time.perf_counter() - t0) * 1000
+            assert previous_stats(path) == stats
+            print(f"{n:6d} {len(big['segments']):9d} {size / 2**20:7.1f} {inline:10.0f} {stream:10.0f} {load:13.0f}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,18 @@
-import os, json, time, requests
+import os, time
 from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound, TranscriptsDisabled
+from index_io import IndexWriter
+import http_client
+from http_client import API_BASE
+from profiling import PROF, run
 
 API_KEY   = os.environ["YOUTUBE_API_KEY"]
 HANDLE    = os.getenv("YOUTUBE_HANDLE", "@blackoutapp")  # include @
 LANGS     = ["en", "en-US"]
 
+@PROF.timed("listing")
 def get_uploads_playlist_id(handle: str):
-    r = requests.get(
-        "https://www.googleapis.com/youtube/v3/channels",
+    r = http_client.get(
+        f"{API_BASE}/channels",
         params={"part": "contentDetails,snippet", "forHandle": handle, "key": API_KEY},
         timeout=30,
     )
@@ -25,8 +30,8 @@ def get_uploads_playlist_id(handle: str):
 def iter_videos(uploads_playlist_id: str):
     page = None
     while True:
-        r = requests.get(
-            "https://www.googleapis.com/youtube/v3/playlistItems",
+        r = http_client.get(
+            f"{API_BASE}/playlistItems",
             params={
                 "part": "contentDetails,snippet",
                 "playlistId": uploads_playlist_id,
@@ -52,35 +57,32 @@ def iter_videos(uploads_playlist_id: str):
 
 def main():
     meta = get_uploads_playlist_id(HANDLE)
-    videos, segments = [], []
-    for v in iter_videos(meta["uploads"]):
-        try:
-            tr = YouTubeTranscriptApi.get_transcript(v["id"], languages=LANGS)
-        except (NoTranscriptFound, TranscriptsDisabled, Exception):
-            continue  # skip videos without transcripts
-        videos.append(v)
-        for s in tr:
-            start = int(s.get("start", 0))
-            text  = s.get("text", "").replace("\n"," ").strip()
-            if not text:
-                continue
-            segments.append({
-                "video_id": v["id"],
-                "start": start,
-                "text": text,
-                "norm": text.lower(),
-            })
-
-    out = {
+    with IndexWriter("public/index.json", {
         "generated_at": int(time.time()),
         "channel": {"id": meta["channel_id"], "title": meta["channel_title"], "handle": HANDLE},
-        "videos": videos,
-        "segments": segments,
-    }
-    os.makedirs("public", exist_ok=True)
-    with open("public/index.json", "w", encoding="utf-8") as f:
-        json.dump(out, f, ensure_ascii=False)
-    print(f"Wrote {len(segments)} segments from {len(videos)} videos")
+    }) as w:
+        for v in iter_videos(meta["uploads"]):
+            try:
+                with PROF.stage("transcript"):
+                    tr = YouTubeTranscriptApi.get_transcript(v["id"], languages=LANGS)
+            except (NoTranscriptFound, TranscriptsDisabled, Exception):
+                continue  # skip videos without transcripts
+            segments = []
+            for s in tr:
+                start = int(s.get("start", 0))
+                text  = s.get("text", "").replace("\n"," ").strip()
+                if not text:
+                    continue
+                segments.append({
+                    "video_id": v["id"],
+                    "start": start,
+                    "text": text,
+                    "norm": text.lower(),
+                })
+            w.add(v, segments)
+    print(f"Wrote {w.n_segments} segments from {w.n_videos} videos")
+    print(http_client.STATS.summary())
+    PROF.write_report("public/index.json", http=http_client.STATS.report())
 
 if __name__ == "__main__":
-    main()
+    run(main)
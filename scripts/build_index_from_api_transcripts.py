@@ -1,15 +1,25 @@
 # scripts/build_index_from_api_transcripts.py
 # Aggregates ALL sources per video:
-#   - Local captions: .srt/.sbv  (src="srt")
+#   - Local captions: .srt/.sbv/.vtt under SRT_DIR  (src="srt")
 #   - Public timedtext captions: VTT (src="transcript")
 #   - Chapters from description (src="chapters")
 #   - Title + description fallback (src="title"/"description")
 #
-# Segments are deduplicated per video. Higher-quality sources win on duplicate text/timestamp.
-
-import os, json, time, re, glob, random
-import requests, srt
-from concurrent.futures import ThreadPoolExecutor, as_completed
+# Segments are deduplicated per video (dedupe.py): near-identical text within DEDUPE_WINDOW
+# seconds is kept once, from the higher-quality source.
+
+import os, sys, json, time, re, hashlib, asyncio
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from captions import CaptionCatalog, normalize_text, parse_caption_file, parse_vtt
+from dedupe import dedupe
+import parse_pool
+from parse_pool import PARSE_PROCS, pack, unpack
+from index_io import IndexWriter, SHARDED
+from index_shards import ShardedIndex
+import http_client
+from http_client import API_BASE, TIMEDTEXT_URL
+from profiling import PROF, run
 
 API_KEY      = os.environ["YOUTUBE_API_KEY"]
 HANDLE       = os.getenv("YOUTUBE_HANDLE", "@blackoutapp")
@@ -21,25 +31,42 @@ WORKERS      = int(os.getenv("WORKERS", "8"))
 PRINT_EVERY  = int(os.getenv("PRINT_EVERY", "10"))
 LIMIT        = int(os.getenv("LIMIT", "0"))
 MAX_DESC_CHARS = 5000
+VIDEOS_PER_CALL = 50   # videos.list accepts up to 50 ids
+OUT_PATH     = os.getenv("OUT_PATH", "public/index.json")
+
+# Async pipeline (ASYNC=1 or --async): per-stage concurrency instead of WORKERS end-to-end threads
+ASYNC            = os.getenv("ASYNC", "0") == "1" or "--async" in sys.argv[1:]
+TRACK_WORKERS    = int(os.getenv("TRACK_WORKERS", "8"))
+DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", "8"))
+PARSE_WORKERS    = int(os.getenv("PARSE_WORKERS", str(max(2, PARSE_PROCS))))  # threads feeding PARSE_PROCS
+QUEUE_SIZE       = int(os.getenv("QUEUE_SIZE", "32"))
+
+# Incremental mode: reuse segments of unchanged videos from the previous OUT_PATH
+INCREMENTAL  = os.getenv("INCREMENTAL", "0") == "1"
+CACHE_PATH   = os.getenv("CACHE_PATH", ".cache/videos.json")
+CACHE_TTL_H  = float(os.getenv("CACHE_TTL_HOURS", "168"))  # re-download chosen tracks (text edits) at least this often
 
 TIMESTAMP_RE  = re.compile(r'\b(?:(\d{1,2}):)?(\d{1,2}):(\d{2})\b')
-SBV_TIMECODE  = re.compile(r'^\s*(\d{1,2}:)?\d{1,2}:\d{2}(?:\.\d+)?\s*,\s*(\d{1,2}:)?\d{1,2}:\d{2}(?:\.\d+)?\s*$')
 
 # Used for dedupe preference (higher is better)
 SOURCE_RANK = {"srt": 3, "transcript": 2, "chapters": 1, "title": 0.2, "description": 0.1}
+DEDUPE_WINDOW = float(os.getenv("DEDUPE_WINDOW", "2"))   # seconds; 0 = exact (start, text) only
+DEDUPE_SIM    = float(os.getenv("DEDUPE_SIM", "0.8"))    # word-set similarity / coverage threshold
 
+@PROF.timed("listing")
 def uploads_playlist_id():
-    r = requests.get("https://www.googleapis.com/youtube/v3/channels",
+    r = http_client.get(f"{API_BASE}/channels",
         params={"part":"contentDetails","forHandle":HANDLE,"key":API_KEY}, timeout=30)
     r.raise_for_status()
     it = r.json().get("items", [])
     if not it: raise SystemExit(f"No channel for {HANDLE}")
     return it[0]["contentDetails"]["relatedPlaylists"]["uploads"]
 
+@PROF.timed("listing")
 def list_uploads(pid):
     out, page = [], None
     while True:
-        r = requests.get("https://www.googleapis.com/youtube/v3/playlistItems",
+        r = http_client.get(f"{API_BASE}/playlistItems",
             params={"part":"contentDetails,snippet","playlistId":pid,"maxResults":50,
                     "pageToken":page,"key":API_KEY}, timeout=30)
         r.raise_for_status()
@@ -56,85 +83,24 @@ def list_uploads(pid):
         if not page: break
     return out
 
-# ---------- helpers ----------
-def normalize_text(s):
-    if not s: return ""
-    s = re.sub(r"\s+", " ", s.replace("\u00A0", " ")).strip()
-    return s
-
-def vtt_to_seconds(ts):
-    ts = ts.replace(",", ".")
-    parts = ts.split(":")
-    if len(parts) == 3:
-        h, m, s = parts
-    else:
-        h, m, s = "0", parts[0], parts[1]
-    return int(float(h)*3600 + float(m)*60 + float(s))
-
-def _sbv_time_to_seconds(tc: str) -> int:
-    parts = tc.strip().split(':')
-    if len(parts) == 3:
-        h, m, s = int(parts[0]), int(parts[1]), float(parts[2])
-    else:
-        h, m, s = 0, int(parts[0]), float(parts[1])
-    return int(h*3600 + m*60 + s)
-
-# ---------- local captions: SRT + SBV ----------
-def local_caption_segments(video_id):
-    patterns = [
-        f"{SRT_DIR}/{video_id}*.srt", f"{SRT_DIR}/**/{video_id}*.srt",
-        f"{SRT_DIR}/{video_id}*.sbv", f"{SRT_DIR}/**/{video_id}*.sbv",
-    ]
-    candidates = []
-    for pat in patterns:
-        candidates.extend(glob.glob(pat, recursive=True))
-    if not candidates:
-        return []
+# ---------- local captions: SRT + SBV + VTT ----------
+_catalog = None
 
-    def score(path: str):
-        s = 0
-        if re.search(r'(?:^|[._-])(en|en-US)(?:[._-]|\.(?:srt|sbv)$)', path, re.I):
-            s += 2
-        if path.lower().endswith('.srt'):
-            s += 1
-        return (s, path)
+def caption_catalog():
+    """Built once per run (main() does it before the worker pool starts)."""
+    global _catalog
+    if _catalog is None:
+        with PROF.stage("catalog"):
+            _catalog = CaptionCatalog(SRT_DIR)
+    return _catalog
 
-    # Prefer the best single file (we aggregate its lines)
-    best = sorted(candidates, key=score, reverse=True)[0]
-    try:
-        with open(best, "r", encoding="utf-8", errors="ignore") as f:
-            content = f.read()
-    except Exception:
-        return []
-
-    segs = []
-    if best.lower().endswith(".srt"):
-        try:
-            subs = list(srt.parse(content))
-        except Exception:
-            subs = []
-        for sub in subs:
-            txt = normalize_text(sub.content or "")
-            if not txt: continue
-            segs.append({"start": int(sub.start.total_seconds()), "text": txt, "norm": txt.lower(), "src": "srt"})
-    else:
-        # SBV
-        blocks = re.split(r'\r?\n\r?\n', content.strip())
-        for block in blocks:
-            lines = [ln.strip() for ln in block.splitlines() if ln.strip()]
-            if not lines: continue
-            if not SBV_TIMECODE.match(lines[0]): continue
-            start_tc = lines[0].split(',')[0].strip()
-            start = _sbv_time_to_seconds(start_tc)
-            text = normalize_text(' '.join(lines[1:]))
-            if text:
-                segs.append({"start": start, "text": text, "norm": text.lower(), "src": "srt"})
-    return segs
+def find_local_caption(video_id):
+    return caption_catalog().best(video_id)
 
 # ---------- public timedtext captions ----------
-def list_tracks_timedtext(video_id):
-    r = requests.get("https://www.youtube.com/api/timedtext",
-                     params={"type":"list","v":video_id,"hl":"en"}, timeout=20)
+def list_tracks_timedtext(video_id, cache=http_client.CACHE_TTL):
+    r = http_client.get(TIMEDTEXT_URL, endpoint="timedtext.list", cache=cache,
+                        params={"type":"list","v":video_id,"hl":"en"}, timeout=20)
     if r.status_code != 200 or "<transcript_list" not in r.text:
         return []
     tracks = []
@@ -160,53 +126,58 @@ def choose_track(tracks):
             return t
     return tracks[0] if tracks else None
 
+@PROF.timed("vtt")
 def fetch_track_vtt(video_id, track):
     params = {"v": video_id, "fmt": "vtt", "lang": track["lang"]}
     if track["kind"] == "asr": params["kind"] = "asr"
     elif track.get("name"):   params["name"] = track["name"]
-    r = requests.get("https://www.youtube.com/api/timedtext", params=params, timeout=30)
+    r = http_client.get(TIMEDTEXT_URL, endpoint="timedtext.vtt", params=params, cache=http_client.CACHE_TTL, timeout=30)
     if r.status_code != 200 or "WEBVTT" not in r.text:
         return None
     return r.text
 
-def parse_vtt(vtt_text):
-    segs = []
-    lines = [ln.rstrip("\n") for ln in vtt_text.splitlines()]
-    i = 0
-    while i < len(lines):
-        ln = lines[i]
-        if "-->" in ln:
-            start = ln.split("-->")[0].strip()
-            i += 1
-            buf = []
-            while i < len(lines) and lines[i].strip():
-                if lines[i].strip().upper().startswith(("NOTE","STYLE")):
-                    break
-                buf.append(lines[i]); i += 1
-            text = normalize_text(" ".join(buf))
-            if text:
-                segs.append({"start": vtt_to_seconds(start), "text": text, "norm": text.lower(), "src": "transcript"})
-        i += 1
-    return segs
-
 # ---------- chapters + metadata ----------
+EMPTY_SNIPPET = {"title": "", "description": "", "duration": None, "etag": None}
+ISO_DURATION_RE = re.compile(r'^P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?$')
+
+def iso_duration_seconds(d):
+    m = ISO_DURATION_RE.match(d or "")
+    if not m or not any(m.groups()): return None
+    dd, h, mi, s = (int(x or 0) for x in m.groups())
+    return dd*86400 + h*3600 + mi*60 + s
+
+@PROF.timed("snippets")
+def fetch_snippets(video_ids):
+    """videos.list, VIDEOS_PER_CALL ids per request -> {id: {title, description, duration, etag}}."""
+    out = {}
+    for i in range(0, len(video_ids), VIDEOS_PER_CALL):
+        batch = video_ids[i:i + VIDEOS_PER_CALL]
+        r = http_client.get(f"{API_BASE}/videos", cache=0,   # always revalidated (ETag -> 304)
+            params={"part":"snippet,contentDetails","id":",".join(batch),
+                    "maxResults":VIDEOS_PER_CALL,"key":API_KEY}, timeout=20)
+        r.raise_for_status()
+        for it in r.json().get("items", []):
+            sn = it.get("snippet", {})
+            out[it["id"]] = {
+                "title": sn.get("title") or "",
+                "description": sn.get("description") or "",
+                "duration": iso_duration_seconds(it.get("contentDetails", {}).get("duration")),
+                "etag": it.get("etag"),
+            }
+    return out
+
 def fetch_snippet(video_id):
-    r = requests.get("https://www.googleapis.com/youtube/v3/videos",
-        params={"part":"snippet","id":video_id,"key":API_KEY}, timeout=20)
-    r.raise_for_status()
-    items = r.json().get("items", [])
-    if not items:
-        return {"title":"", "description":""}
-    sn = items[0]["snippet"]
-    return {"title": sn.get("title") or "", "description": sn.get("description") or ""}
+    return fetch_snippets([video_id]).get(video_id, EMPTY_SNIPPET)
 
-def chapters_from_description(desc):
+def chapters_from_description(desc, duration=None):
+    """Timestamped description lines; timestamps past the video's duration (if known) are not chapters."""
     segs = []
     for line in (desc or "").splitlines():
         m = TIMESTAMP_RE.search(line)
         if not m: continue
         h, m_, s = m.groups()
         t = (int(h) if h else 0)*3600 + int(m_)*60 + int(s)
+        if duration and t > duration: continue
         text = TIMESTAMP_RE.sub("", line, count=1)
         text = normalize_text(text.strip(" -–—:·|"))
         if text:
@@ -224,43 +195,229 @@ def metadata_segments(title, desc):
     return out
 
 # ---------- merge + dedupe ----------
+@PROF.timed("dedupe")
 def dedupe_segments(segs):
     """
-    Remove near-duplicate (start,text) within a video, preferring higher SOURCE_RANK.
-    We round start to nearest second and compare lowercase text.
+    Remove near-duplicates within a video, preferring higher SOURCE_RANK: same normalized text
+    or similar wording within DEDUPE_WINDOW seconds (see dedupe.py). Output is sorted by start.
     """
-    seen = {}
-    for s in sorted(segs, key=lambda x: (-SOURCE_RANK.get(x["src"], 0), x["start"])):
-        key = (int(round(s["start"])), s["text"].lower())
-        if key in seen:
-            continue
-        seen[key] = s
-    return list(seen.values())
+    return dedupe(segs, SOURCE_RANK, DEDUPE_WINDOW, DEDUPE_SIM)
 
 # ---------- pipeline ----------
-def process_video(v):
+_tracks = {}  # video_id -> chosen track, asked once per run (split_by_cache asks first in incremental mode)
+
+@PROF.timed("tracks")
+def discover_track(v, revalidate=False):
+    """revalidate: bypass a fresh cached track list (a video still waiting for its ASR track)."""
+    if v["id"] not in _tracks:
+        tracks = list_tracks_timedtext(v["id"], cache=0 if revalidate else http_client.CACHE_TTL)
+        _tracks[v["id"]] = choose_track(tracks)
+    return _tracks[v["id"]]
+
+def build_segments(v, sn, vtt, caption_path=None):
+    """
+    CPU part of process_video: local caption file + downloaded VTT + chapters/metadata, deduped.
+    May run in a parse_pool worker process, so everything it needs is passed in.
+    """
     all_segs = []
 
-    # local captions
-    all_segs += local_caption_segments(v["id"])
+    with PROF.stage("parse"):
+        # local captions
+        if caption_path:
+            all_segs += parse_caption_file(caption_path, src="srt")
 
-    # public captions
-    tracks = list_tracks_timedtext(v["id"])
-    chosen = choose_track(tracks)
-    if chosen:
-        vtt = fetch_track_vtt(v["id"], chosen)
+        # public captions
         if vtt:
             all_segs += parse_vtt(vtt)
 
     # chapters + metadata
-    sn = fetch_snippet(v["id"])
-    all_segs += chapters_from_description(sn["description"])
+    all_segs += chapters_from_description(sn["description"], sn["duration"])
     all_segs += metadata_segments(sn["title"] or v["title"] or "", sn["description"] or "")
 
     # finalize
     for s in all_segs:
         s["video_id"] = v["id"]
-    return v, dedupe_segments(all_segs)
+    return dedupe_segments(all_segs)
+
+def _build_packed(v, sn, vtt, caption_path):
+    return pack(build_segments(v, sn, vtt, caption_path))
+
+_parse_pool = None
+
+def parse_executor():
+    """Worker processes for build_segments when PARSE_PROCS > 0, else None."""
+    global _parse_pool
+    if _parse_pool is None and PARSE_PROCS > 0:
+        _parse_pool = parse_pool.pool(PARSE_PROCS)
+    return _parse_pool
+
+@PROF.timed("build")
+def build_video(v, sn, vtt):
+    """build_segments in the calling thread, or in a worker process (compact result) with PARSE_PROCS."""
+    path = find_local_caption(v["id"])
+    ex = parse_executor()
+    if ex is None:
+        return build_segments(v, sn, vtt, path)
+    return unpack(ex.submit(_build_packed, v, sn, vtt, path).result(), v["id"])
+
+@PROF.timed("video")
+def process_video(v, sn=None):
+    """sn: this video's entry from fetch_snippets() (fetched here if not given)."""
+    chosen = discover_track(v)
+    vtt = fetch_track_vtt(v["id"], chosen) if chosen else None
+    if sn is None:
+        sn = fetch_snippet(v["id"])
+    return v, build_video(v, sn, vtt)
+
+def run_threads(vids, snippets, on_result):
+    """At most 2 * WORKERS videos in flight; each result is dropped once handed on, so memory stays flat."""
+    todo, pending = iter(vids), set()
+    with PROF.pool("threads", WORKERS, "video"), ThreadPoolExecutor(max_workers=WORKERS) as ex:
+        def submit(n):
+            for v in islice(todo, n):
+                pending.add(ex.submit(process_video, v, snippets.get(v["id"], EMPTY_SNIPPET)))
+        submit(2 * WORKERS)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                pending.discard(fut)
+                on_result(*fut.result())
+            submit(len(done))
+
+# ---------- async pipeline ----------
+# tracks -> download -> parse -> on_result, each stage with its own worker count and a bounded
+# queue in front of it, so slow downloads never hold up parsing (blocking calls run via to_thread).
+async def run_async(vids, snippets, on_result):
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=TRACK_WORKERS + DOWNLOAD_WORKERS + PARSE_WORKERS))
+    q_tracks, q_download, q_parse, q_done = (asyncio.Queue(QUEUE_SIZE) for _ in range(4))
+
+    async def stage(n, inbox, fn, outbox, consumers):
+        async def worker():
+            while (item := await inbox.get()) is not None:
+                await outbox.put(await fn(*item))
+        await asyncio.gather(*(worker() for _ in range(n)))
+        for _ in range(consumers):
+            await outbox.put(None)  # one sentinel per downstream worker
+
+    async def tracks(v):
+        return v, await asyncio.to_thread(discover_track, v)
+
+    async def download(v, chosen):
+        return v, (await asyncio.to_thread(fetch_track_vtt, v["id"], chosen) if chosen else None)
+
+    async def parse(v, vtt):
+        return v, await asyncio.to_thread(build_video, v, snippets.get(v["id"], EMPTY_SNIPPET), vtt)
+
+    async def feed():
+        for v in vids:
+            await q_tracks.put((v,))
+        for _ in range(TRACK_WORKERS):
+            await q_tracks.put(None)
+
+    async def write():
+        while (item := await q_done.get()) is not None:
+            on_result(*item)
+
+    with PROF.pool("async.tracks", TRACK_WORKERS, "tracks"), \
+         PROF.pool("async.download", DOWNLOAD_WORKERS, "vtt"), \
+         PROF.pool("async.parse", PARSE_WORKERS, "build"):
+        await asyncio.gather(
+            feed(),
+            stage(TRACK_WORKERS, q_tracks, tracks, q_download, DOWNLOAD_WORKERS),
+            stage(DOWNLOAD_WORKERS, q_download, download, q_parse, PARSE_WORKERS),
+            stage(PARSE_WORKERS, q_parse, parse, q_done, 1),
+            write(),
+        )
+
+# ---------- incremental cache ----------
+def video_fingerprint(v, sn, track):
+    """
+    Cheap change detector computed before any caption download: the videos.list etag (covers
+    title, description and the contentDetails.caption flag), the chosen caption track (lang, kind,
+    name: an ASR track appearing after upload changes it, the etag does not), local caption file
+    contents and the config that shapes segments. Edits to the text of the same track are only
+    picked up by CACHE_TTL_HOURS.
+    """
+    h = hashlib.sha1()
+    track = track and [track["lang"], track["kind"], track["name"]]
+    h.update(json.dumps([sn.get("etag"), track, PREF_LANGS, ALLOW_AUTO, SOURCE_RANK, MAX_DESC_CHARS,
+                         DEDUPE_WINDOW, DEDUPE_SIM]).encode("utf-8"))
+    path = find_local_caption(v["id"])
+    if path:
+        h.update(path.encode("utf-8"))
+        try:
+            with open(path, "rb") as f:
+                h.update(f.read())
+        except OSError:
+            pass
+    return h.hexdigest()
+
+def load_cache():
+    try:
+        with open(CACHE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f).get("videos", {})
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(entries):
+    os.makedirs(os.path.dirname(CACHE_PATH) or ".", exist_ok=True)
+    tmp = CACHE_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "videos": entries}, f)
+    os.replace(tmp, CACHE_PATH)
+
+class PreviousSegments:
+    """
+    video_id -> segments of the last published index. With SHARDED=1 each video is read from its
+    shard only when reused; otherwise OUT_PATH is loaded once (empty if missing/unreadable).
+    """
+    def __init__(self):
+        self.shards, self.by_vid = None, {}
+        if SHARDED:
+            try:
+                self.shards = ShardedIndex(os.path.join(os.path.dirname(OUT_PATH), "shards"), cache=False)
+                return
+            except (OSError, ValueError, KeyError):
+                pass
+        try:
+            with open(OUT_PATH, "r", encoding="utf-8") as f:
+                prev = json.load(f)
+        except (OSError, ValueError):
+            return
+        for s in prev.get("segments", []):
+            self.by_vid.setdefault(s.get("video_id"), []).append(s)
+
+    def __contains__(self, video_id):
+        return video_id in (self.shards if self.shards else self.by_vid)
+
+    def get(self, video_id):
+        if not self.shards:
+            return self.by_vid.get(video_id, [])
+        return [{"start": r["start"], "text": r["text"], "norm": r["text"].lower(), "src": r.get("src"),
+                 "video_id": video_id} for r in self.shards.video_segments(video_id)]
+
+@PROF.timed("incremental.split")
+def split_by_cache(vids, snippets, cache, prev):
+    """
+    Return (reused [v], todo [v], fingerprints {id: fp}). Lists every video's caption tracks
+    (HTTP-cached, except for videos last seen without a transcript, which are revalidated).
+    """
+    def track(v):
+        return discover_track(v, revalidate=not cache.get(v["id"], {}).get("transcript"))
+    with ThreadPoolExecutor(max_workers=WORKERS) as ex:
+        tracks = dict(zip((v["id"] for v in vids), ex.map(track, vids)))
+    now = time.time()
+    reused, todo, fps = [], [], {}
+    for v in vids:
+        fp = fps[v["id"]] = video_fingerprint(v, snippets.get(v["id"], EMPTY_SNIPPET), tracks[v["id"]])
+        c = cache.get(v["id"])
+        fresh = c and c.get("fp") == fp and now - c.get("checked_at", 0) < CACHE_TTL_H * 3600
+        if fresh and (c.get("segs", 0) == 0 or v["id"] in prev):
+            reused.append(v)
+        else:
+            todo.append(v)
+    return reused, todo, fps
 
 def main():
     pid = uploads_playlist_id()
@@ -268,43 +425,68 @@ def main():
     if LIMIT and LIMIT > 0:
         vids = vids[:LIMIT]
     total = len(vids)
-    print(f"Discovered {total} uploads. Processing with WORKERS={WORKERS} LIMIT={LIMIT or 'none'}")
 
-    videos, segments = [], []
+    caption_catalog()
+    snippets = fetch_snippets([v["id"] for v in vids])
+    cache, reused, fps, prev = {}, [], {}, None
+    if INCREMENTAL:
+        with PROF.stage("incremental.load"):
+            cache, prev = load_cache(), PreviousSegments()
+        reused, vids, fps = split_by_cache(vids, snippets, cache, prev)
+    mode = (f"async tracks/download/parse={TRACK_WORKERS}/{DOWNLOAD_WORKERS}/{PARSE_WORKERS}"
+            if ASYNC else f"WORKERS={WORKERS}")
+    print(f"Discovered {total} uploads ({len(reused)} unchanged). "
+          f"Processing {len(vids)} with {mode} LIMIT={LIMIT or 'none'}")
+
     done = 0
     counts = {"srt":0,"transcript":0,"chapters":0,"title":0,"description":0}
-
-    with ThreadPoolExecutor(max_workers=WORKERS) as ex:
-        futs = [ex.submit(process_video, v) for v in vids]
-        for fut in as_completed(futs):
-            v, segs = fut.result()
-            if segs:
-                videos.append(v)
-                segments.extend(segs)
-                # count sources present for logging
-                seen_src = set(s["src"] for s in segs)
-                for k in counts:
-                    if k in seen_src: counts[k] += 1
-            done += 1
-            if done % PRINT_EVERY == 0 or done == total:
-                print(f"Processed {done}/{total}… vids_with_data:{len(videos)}  segs:{len(segments)}  src_hits:{counts}")
-
-    os.makedirs("public", exist_ok=True)
-    with open("public/index.json","w",encoding="utf-8") as f:
-        json.dump({
-            "generated_at": int(time.time()),
-            "channel": {"handle": HANDLE},
-            "videos": videos,
-            "segments": segments,     # each has video_id, start, text, norm, src
+    new_cache = {}
+    writer = IndexWriter(OUT_PATH, {"generated_at": int(time.time()), "channel": {"handle": HANDLE}})
+
+    def add(v, segs):
+        if segs:
+            writer.add(v, segs)   # each segment has video_id, start, text, norm, src
+            # count sources present for logging
+            seen_src = set(s["src"] for s in segs)
+            for k in counts:
+                if k in seen_src: counts[k] += 1
+
+    now = time.time()
+    def on_result(v, segs):
+        nonlocal done
+        add(v, segs)
+        if INCREMENTAL:
+            new_cache[v["id"]] = {"fp": fps[v["id"]], "checked_at": now, "segs": len(segs),
+                                  "transcript": any(s["src"] == "transcript" for s in segs)}
+        done += 1
+        if done % PRINT_EVERY == 0 or done == len(vids):
+            print(f"Processed {done}/{len(vids)}… vids_with_data:{writer.n_videos}  segs:{writer.n_segments}  src_hits:{counts}")
+
+    with writer:
+        for v in reused:
+            add(v, prev.get(v["id"]) if cache[v["id"]].get("segs") else [])
+            new_cache[v["id"]] = cache[v["id"]]
+        if ASYNC:
+            asyncio.run(run_async(vids, snippets, on_result))
+        else:
+            run_threads(vids, snippets, on_result)
+        writer.trailer.update({
             "source_video_counts": counts,
             "config": {
                 "allow_auto": ALLOW_AUTO,
                 "pref_langs": PREF_LANGS,
                 "srt_dir": SRT_DIR,
-                "source_rank": SOURCE_RANK
+                "source_rank": SOURCE_RANK,
+                "dedupe": {"window": DEDUPE_WINDOW, "sim": DEDUPE_SIM}
             },
-        }, f, ensure_ascii=False)
-    print(f"✅ Done. Segments:{len(segments)} from Videos:{len(videos)} | per-source video counts: {counts}")
+        })
+    if _parse_pool:
+        _parse_pool.shutdown()
+    if INCREMENTAL:
+        save_cache(new_cache)
+    print(http_client.STATS.summary())
+    print(f"✅ Done. Segments:{writer.n_segments} from Videos:{writer.n_videos} | per-source video counts: {counts}")
+    PROF.write_report(OUT_PATH, http=http_client.STATS.report())
 
 if __name__ == "__main__":
-    main()
+    run(main)
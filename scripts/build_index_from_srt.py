@@ -1,8 +1,12 @@
 # scripts/build_index_from_srt.py
-import json, os, glob, time
-import srt
+import json, os, time
+from captions import CaptionCatalog
+from index_io import IndexWriter
+from parse_pool import parse_files, pool
+from profiling import PROF, run
 
 CHANNEL_HANDLE = os.getenv("YT_HANDLE", "@blackoutapp")
+CAPTIONS_DIR   = os.getenv("CAPTIONS_DIR", "captions")
 
 def load_titles():
     titles = {}
@@ -19,52 +23,25 @@ def load_titles():
     return titles
 
 def pick_caption_files():
-    """Return dict video_id -> chosen srt path (prefer manual over auto)."""
-    paths = glob.glob("captions/*.srt")
-    manual = {}
-    auto = {}
-    for p in paths:
-        base = os.path.basename(p)
-        parts = base.split(".")
-        vid = parts[0]
-        is_auto = len(parts) >= 3 and parts[1] == "auto"  # abc123.auto.srt
-        if is_auto:
-            auto[vid] = p
-        else:
-            manual[vid] = p
-    chosen = {}
-    vids = set(list(auto.keys()) + list(manual.keys()))
-    for vid in vids:
-        chosen[vid] = manual.get(vid, auto.get(vid))
-    return chosen
+    """Return dict video_id -> chosen caption path (prefer manual over auto, see captions.caption_score)."""
+    with PROF.stage("catalog"):
+        catalog = CaptionCatalog(CAPTIONS_DIR)
+    return {vid: catalog.best(vid) for vid in catalog}
 
 def main():
     titles = load_titles()
     chosen = pick_caption_files()
-    segments = []
-    for vid, path in sorted(chosen.items()):
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            subs = list(srt.parse(f.read()))
-        for sub in subs:
-            start = int(sub.start.total_seconds())
-            text = " ".join(str(sub.content).split())
-            if text:
-                segments.append({
-                    "video_id": vid,
-                    "start": start,
-                    "text": text,
-                    "norm": text.lower(),
-                })
-    videos = [{"id": v, "title": titles.get(v, v), "url": f"https://youtu.be/{v}"} for v in sorted(chosen)]
-    os.makedirs("public", exist_ok=True)
-    with open("public/index.json", "w", encoding="utf-8") as f:
-        json.dump({
-            "generated_at": int(time.time()),
-            "channel": {"handle": CHANNEL_HANDLE, "url": f"https://www.youtube.com/{CHANNEL_HANDLE}"},
-            "videos": videos,
-            "segments": segments,
-        }, f, ensure_ascii=False)
-    print(f"Indexed {len(segments)} segments from {len(videos)} videos")
+    ex = pool()  # PARSE_PROCS=N parses in N worker processes
+    with IndexWriter("public/index.json", {
+        "generated_at": int(time.time()),
+        "channel": {"handle": CHANNEL_HANDLE, "url": f"https://www.youtube.com/{CHANNEL_HANDLE}"},
+    }) as w:
+        for vid, segs in parse_files(((vid, path, "srt") for vid, path in sorted(chosen.items())), ex):
+            w.add({"id": vid, "title": titles.get(vid, vid), "url": f"https://youtu.be/{vid}"}, segs)
+    if ex:
+        ex.shutdown()
+    print(f"Indexed {w.n_segments} segments from {w.n_videos} videos")
+    PROF.write_report("public/index.json")
 
 if __name__ == "__main__":
-    main()
+    run(main)
@@ -0,0 +1,108 @@
+# scripts/captions.py
+# Local caption files shared by the builders:
+#   - CaptionCatalog: ONE walk of a caption tree -> video id -> candidate files (best first)
+#   - parsers for .srt / .sbv / .vtt into {"start", "text", "norm", "src"} segments
+#     (one regex pass per file; start keeps millisecond precision)
+#
+# Files are matched to a video by name prefix, like the old "<id>*.srt" globs:
+#   srt/abc123DEF45.sbv, srt/sub/abc123DEF45.en.srt, captions/abc123DEF45.auto.srt, ...
+
+import os, re
+
+CAPTION_EXTS  = (".srt", ".sbv", ".vtt")
+VIDEO_ID_RE   = re.compile(r"^[A-Za-z0-9_-]{11}")
+EN_RE         = re.compile(r'(?:^|[._-])(en|en-US)(?:[._-]|\.(?:srt|sbv|vtt)$)', re.I)
+
+# One regex pass over the whole file per format: a cue is its timing line plus the non-blank
+# lines after it. Start timecodes [h:]mm:ss[.,fff] are captured as (h, m, s, frac).
+_START  = r'^[ \t]*(?:(\d+):)?(\d{1,2}):(\d{2})(?:[.,](\d+))?[ \t]*'
+_END    = r'(?:\d+:)?\d{1,2}:\d{2}(?:[.,]\d+)?'
+_TEXT   = r'((?:[^\n]*\S[^\n]*(?:\n|\Z))*)'
+ARROW_CUE_RE = re.compile(_START + r'-->[^\n]*\n' + _TEXT, re.M)             # SRT and VTT
+SBV_CUE_RE   = re.compile(_START + r',[ \t]*' + _END + r'[ \t]*\n' + _TEXT, re.M)
+
+# ---------- text + timecodes ----------
+def normalize_text(s):
+    # str.split() splits on the same Unicode whitespace as \s (NBSP included), without a regex call
+    return " ".join(s.split()) if s else ""
+
+def _seconds(h, m, sec, frac):
+    """Timecode groups -> seconds; int when whole, else float with millisecond precision."""
+    ms = ((int(h or 0) * 60 + int(m)) * 60 + int(sec)) * 1000 + (int(frac.ljust(3, "0")[:3]) if frac else 0)
+    return ms // 1000 if ms % 1000 == 0 else ms / 1000
+
+# ---------- catalog ----------
+def caption_score(path: str):
+    """Higher is better: English-tagged (+2), .srt (+1), manual over auto-generated (*.auto.*)."""
+    s = 0
+    if EN_RE.search(path):
+        s += 2
+    if path.lower().endswith('.srt'):
+        s += 1
+    if ".auto." in os.path.basename(path).lower():
+        s -= 4
+    return (s, path)
+
+def caption_video_id(name):
+    m = VIDEO_ID_RE.match(name)
+    return m.group(0) if m else name.split(".")[0]
+
+class CaptionCatalog:
+    """video id -> caption files under root, best first. Built with a single os.walk."""
+    def __init__(self, root):
+        self.root = root
+        files = {}
+        for d, dirs, names in os.walk(root, followlinks=True):
+            dirs[:] = [x for x in dirs if not x.startswith(".")]
+            for name in names:
+                if name.startswith(".") or not name.lower().endswith(CAPTION_EXTS):
+                    continue
+                files.setdefault(caption_video_id(name), []).append(os.path.join(d, name))
+        self._files = {vid: sorted(paths, key=caption_score, reverse=True) for vid, paths in files.items()}
+
+    def candidates(self, video_id):
+        return self._files.get(video_id, [])
+
+    def best(self, video_id):
+        c = self._files.get(video_id)
+        return c[0] if c else None
+
+    def __contains__(self, video_id):
+        return video_id in self._files
+
+    def __iter__(self):
+        return iter(sorted(self._files))
+
+    def __len__(self):
+        return len(self._files)
+
+# ---------- parsers ----------
+def _parse_cues(cue_re, content, src):
+    segs = []
+    for h, m, sec, frac, body in cue_re.findall(content.replace("\r\n", "\n")):
+        text = normalize_text(body)
+        if text:
+            segs.append({"start": _seconds(h, m, sec, frac), "text": text, "norm": text.lower(), "src": src})
+    return segs
+
+def parse_srt(content, src="srt"):
+    return _parse_cues(ARROW_CUE_RE, content, src)
+
+def parse_sbv(content, src="srt"):
+    return _parse_cues(SBV_CUE_RE, content, src)
+
+def parse_vtt(vtt_text, src="transcript"):
+    return _parse_cues(ARROW_CUE_RE, vtt_text, src)
+
+PARSERS = {".srt": parse_srt, ".sbv": parse_sbv, ".vtt": parse_vtt}
+
+def parse_caption_file(path, src="srt"):
+    """Segments of a local caption file, sorted by start (hand-edited files can have cues out of order)."""
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            content = f.read()
+    except Exception:
+        return []
+    segs = PARSERS[os.path.splitext(path)[1].lower()](content, src)
+    segs.sort(key=lambda s: s["start"])  # stable: cues with the same start keep file order
+    return segs
@@ -0,0 +1,69 @@
+# scripts/dedupe.py
+# Near-duplicate removal for one video's segments merged from several sources
+# (local captions, downloaded VTT, chapters, title/description).
+#
+# Segments are visited best source first (rank, then start). One is dropped when a segment
+# already kept within +/- window seconds
+#   - has the same normalized text (lowercase words, punctuation and line breaks ignored), or,
+#     if it comes from another source (src),
+#   - has a word-set Jaccard similarity >= sim, or
+#   - (re-segmented captions) the kept segments of other sources in that window together cover
+#     >= sim of its words, for segments of at least MIN_COVER_WORDS words.
+# The fuzzy rules never compare lines of the same source: "my uptime is one second" must not
+# swallow "my downtime is one second" a few lines later in the same caption file.
+# Kept segments are bucketed by floor(start / window), so each segment is only compared with
+# the handful of kept segments in its own and the two neighbouring buckets: linear in the
+# number of segments for caption-like densities, plus the initial sort.
+
+import re
+
+WORD_RE = re.compile(r"\w+")
+MIN_COVER_WORDS = 4
+
+def words(text):
+    return WORD_RE.findall(text.lower())
+
+def dedupe(segs, rank, window=2.0, sim=0.8):
+    """
+    Returns the kept segments sorted by start (ties: better source first).
+    rank maps src -> priority (higher wins); window <= 0 only removes exact (start, text) repeats.
+    """
+    if window <= 0:
+        seen, out = set(), []
+        for s in sorted(segs, key=lambda x: (-rank.get(x["src"], 0), x["start"])):
+            key = (s["start"], " ".join(words(s.get("norm") or s["text"])))
+            if key not in seen:
+                seen.add(key); out.append(s)
+        return sorted(out, key=lambda x: x["start"])
+
+    exact = {}     # normalized text -> starts of kept segments (fast path for the common case)
+    buckets = {}   # floor(start / window) -> [(start, word set, src), ...] of kept segments
+    kept = []
+    for s in sorted(segs, key=lambda x: (-rank.get(x["src"], 0), x["start"])):
+        w = words(s.get("norm") or s["text"])
+        key, start = " ".join(w), s["start"]
+        starts = exact.get(key)
+        if starts and any(abs(t - start) <= window for t in starts):
+            continue
+        b = int(start // window)
+        ws = set(w)
+        src = s.get("src")
+        near = [k for i in (b - 1, b, b + 1) for k in buckets.get(i, ()) if abs(k[0] - start) <= window and k[2] != src]
+        if near and _duplicate(ws, near, sim):
+            continue
+        exact.setdefault(key, []).append(start)
+        buckets.setdefault(b, []).append((start, ws, src))
+        kept.append(s)
+    kept.sort(key=lambda x: x["start"])
+    return kept
+
+def _duplicate(ws, near, sim):
+    if not ws:
+        return False
+    covered = set()
+    for _, kws, _ in near:
+        inter = len(ws & kws)
+        if inter and inter >= sim * len(ws | kws):
+            return True
+        covered |= kws & ws
+    return len(ws) >= MIN_COVER_WORDS and len(covered) >= sim * len(ws)
@@ -0,0 +1,217 @@
+# scripts/fake_youtube.py
+# Local stand-in for the YouTube endpoints the builders call, serving a synthetic channel:
+#   /youtube/v3/channels, /youtube/v3/playlistItems, /youtube/v3/videos, /api/timedtext (list + vtt),
+#   /youtube/v3/captions (list) + /youtube/v3/captions/<id> (SRT download, needs a Bearer token),
+#   /token (OAuth refresh -> access token)
+#
+# Every response is delayed by FAKE_LATENCY seconds (+/- 50% jitter) to mimic network round-trips;
+# FAKE_ERROR_RATE of requests fail with a 503 (or a 429 with Retry-After) before being served.
+# Responses carry an ETag (hash of the body) and If-None-Match is answered with 304.
+# Access tokens from /token expire after FAKE_TOKEN_TTL seconds (401 on /captions after that).
+# Point the builders at it with:
+#   YOUTUBE_API_BASE=<base>/youtube/v3 TIMEDTEXT_URL=<base>/api/timedtext OAUTH_TOKEN_URL=<base>/token
+#
+# Standalone: FAKE_VIDEOS=200 FAKE_CUES=120 FAKE_LATENCY=0.05 FAKE_PORT=8765 python scripts/fake_youtube.py
+# From a benchmark: proc, env = spawn(videos, cues, latency)   (separate process, prints its env line)
+# Local caption trees for the same channel: SyntheticChannel(...).write_captions(root, share, mix)
+
+import os, sys, json, time, random, hashlib, threading, subprocess
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+WORDS = ("fader page cue sequence fixture patch dmx lighting blackout capture scene color intensity "
+         "astera pixel macro favorite timing preset group palette output universe channel stream deck").split()
+
+def _ts(sec, sep="."):
+    ms = round(sec * 1000)
+    return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d}{sep}{ms % 1000:03d}"
+
+# Caption renderings of [(start seconds, text), ...], each cue lasting `dur` seconds (also used by
+# the caption benchmarks to turn a parsed corpus back into files).
+def render_vtt(cues, dur=3.2, settings=""):
+    settings = f" {settings}" if settings else ""
+    return "WEBVTT\n\n" + "\n".join(f"{_ts(s)} --> {_ts(s + dur)}{settings}\n{t}\n" for s, t in cues)
+
+def render_srt(cues, dur=3.2):
+    return "\n".join(f"{i}\n{_ts(s, ',')} --> {_ts(s + dur, ',')}\n{t}\n" for i, (s, t) in enumerate(cues, 1))
+
+def render_sbv(cues, dur=3.2):
+    return "\n".join(f"{_ts(s)[1:]},{_ts(s + dur)[1:]}\n{t}\n" for s, t in cues)
+
+RENDERERS = {"vtt": render_vtt, "srt": render_srt, "sbv": render_sbv}
+
+class SyntheticChannel:
+    """
+    n_videos videos of about `cues` caption cues each (+/- vary, as a fraction), `chapters`
+    timestamped description lines. Deterministic for a given seed, so a benchmark and a spawned
+    server built with the same arguments agree on the channel.
+    """
+    def __init__(self, n_videos=100, cues=120, seed=1, vary=0.0, chapters=5):
+        rnd = random.Random(seed)
+        self.videos = []
+        for i in range(n_videos):
+            vid = f"v{i:06d}".ljust(11, "x")
+            n = max(1, round(cues * rnd.uniform(1 - vary, 1 + vary)))
+            chap = "\n".join(f"{m // 60}:{m % 60:02d} {rnd.choice(WORDS).title()}" for m in range(0, 60 * chapters, 60))
+            self.videos.append({
+                "id": vid,
+                "title": f"Video {i}: {' '.join(rnd.choices(WORDS, k=5))}",
+                "description": f"{' '.join(rnd.choices(WORDS, k=40))}\n{chap}",
+                "cues": [(c * 3.2, " ".join(rnd.choices(WORDS, k=rnd.randint(4, 10)))) for c in range(n)],
+            })
+        self.by_id = {v["id"]: v for v in self.videos}
+
+    def vtt(self, vid):
+        return render_vtt(self.by_id[vid]["cues"])
+
+    def srt(self, vid):
+        return render_srt(self.by_id[vid]["cues"])
+
+    def sbv(self, vid):
+        return render_sbv(self.by_id[vid]["cues"])
+
+    def write_captions(self, root, share=1.0, mix="srt,sbv,vtt"):
+        """Write local caption files for the first `share` of the videos, cycling through mix."""
+        exts = [e.strip() for e in mix.split(",") if e.strip()]
+        os.makedirs(root, exist_ok=True)
+        n = round(len(self.videos) * share)
+        for i, v in enumerate(self.videos[:n]):
+            ext = exts[i % len(exts)]
+            with open(os.path.join(root, f"{v['id']}.{ext}"), "w", encoding="utf-8") as f:
+                f.write(getattr(self, ext)(v["id"]))
+        return n
+
+class FakeYouTube:
+    def __init__(self, channel, latency=0.0, port=0, error_rate=0.0, token_ttl=3600):
+        self.channel, self.latency, self.error_rate = channel, latency, error_rate
+        self.token_ttl, self.tokens = token_ttl, {}  # access token -> expiry
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+            def log_message(self, *a): pass
+
+            def reply(self, status, ctype, data, headers=()):
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in headers:
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def handle_any(self, method):
+                if method == "POST":
+                    self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if fake.latency:
+                    time.sleep(fake.latency * random.uniform(0.5, 1.5))
+                if fake.error_rate and random.random() < fake.error_rate:
+                    if random.random() < 0.5:
+                        return self.reply(503, "text/plain", b"backend error")
+                    return self.reply(429, "text/plain", b"rate limited", [("Retry-After", "0")])
+                u = urlsplit(self.path)
+                q = {k: v[0] for k, v in parse_qs(u.query).items()}
+                status, ctype, body = fake.route(u.path, q, method, self.headers.get("Authorization", ""))
+                data = body.encode("utf-8")
+                etag = f'"{hashlib.sha1(data).hexdigest()[:16]}"'
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    status, data = 304, b""
+                self.reply(status, ctype, data, [("ETag", etag)] if status in (200, 304) else [])
+
+            def do_GET(self):
+                self.handle_any("GET")
+
+            def do_POST(self):
+                self.handle_any("POST")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+
+    def env(self):
+        return {"YOUTUBE_API_BASE": f"{self.base}/youtube/v3", "TIMEDTEXT_URL": f"{self.base}/api/timedtext",
+                "OAUTH_TOKEN_URL": f"{self.base}/token"}
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown(); self.server.server_close()
+
+    # ---------- endpoints ----------
+    def route(self, path, q, method="GET", auth=""):
+        js = lambda obj: (200, "application/json", json.dumps(obj))
+        vids = self.channel.videos
+        if path.endswith("/token") and method == "POST":
+            access = f"fake-access-token-{len(self.tokens)}"
+            self.tokens[access] = time.time() + self.token_ttl
+            return js({"access_token": access, "expires_in": self.token_ttl, "token_type": "Bearer"})
+        if "/captions" in path:
+            if self.tokens.get(auth[len("Bearer "):], 0) < time.time():
+                return 401, "application/json", json.dumps({"error": {"code": 401}})
+            if path.endswith("/captions"):
+                vid = q.get("videoId")
+                if vid not in self.channel.by_id:
+                    return js({"items": []})
+                return js({"items": [{"id": f"cap-{vid}", "snippet": {"videoId": vid, "language": "en",
+                                      "trackKind": "standard", "lastUpdated": "2026-01-01T00:00:00Z"}}]})
+            vid = path.rsplit("/", 1)[-1][len("cap-"):]
+            if vid not in self.channel.by_id:
+                return 404, "text/plain", ""
+            return 200, "text/plain", self.channel.srt(vid)
+        if path.endswith("/channels"):
+            return js({"items": [{"id": "UCfake", "snippet": {"title": "Fake channel"},
+                                  "contentDetails": {"relatedPlaylists": {"uploads": "UUfake"}}}]})
+        if path.endswith("/playlistItems"):
+            start, n = int(q.get("pageToken") or 0), int(q.get("maxResults") or 50)
+            page = vids[start:start + n]
+            out = {"items": [{"snippet": {"title": v["title"], "description": v["description"]},
+                              "contentDetails": {"videoId": v["id"], "videoPublishedAt": "2026-01-01T00:00:00Z"}}
+                             for v in page]}
+            if start + n < len(vids):
+                out["nextPageToken"] = str(start + n)
+            return js(out)
+        if path.endswith("/videos"):
+            items = []
+            for vid in (q.get("id") or "").split(","):
+                v = self.channel.by_id.get(vid)
+                if v:
+                    items.append({"id": vid, "etag": f"etag-{vid}",
+                                  "snippet": {"title": v["title"], "description": v["description"]},
+                                  "contentDetails": {"duration": "PT10M", "caption": "true"}})
+            return js({"items": items})
+        if path.endswith("/timedtext"):
+            vid = q.get("v")
+            if vid not in self.channel.by_id:
+                return 404, "text/plain", ""
+            if q.get("type") == "list":
+                return 200, "text/xml", ('<?xml version="1.0" ?><transcript_list docid="1">'
+                                         '<track id="0" name="" lang_code="en" lang_original="English" '
+                                         'lang_translated="English" lang_default="true"/></transcript_list>')
+            return 200, "text/vtt", self.channel.vtt(vid)
+        return 404, "text/plain", "not found"
+
+def spawn(videos, cues=120, latency=0.0, error_rate=0.0, vary=0.0, chapters=5, seed=1, token_ttl=3600):
+    """Run the fake server in a child process (so it doesn't compete for the caller's GIL).
+    Returns (process, env dict); terminate the process when done."""
+    env = {**os.environ, "FAKE_VIDEOS": str(videos), "FAKE_CUES": str(cues), "FAKE_LATENCY": str(latency),
+           "FAKE_ERROR_RATE": str(error_rate), "FAKE_VARY": str(vary), "FAKE_CHAPTERS": str(chapters),
+           "FAKE_SEED": str(seed), "FAKE_TOKEN_TTL": str(token_ttl), "FAKE_PORT": "0"}
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__)], env=env,
+                            stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    return proc, dict(kv.split("=", 1) for kv in line.split())
+
+def main():
+    channel = SyntheticChannel(int(os.getenv("FAKE_VIDEOS", "100")), int(os.getenv("FAKE_CUES", "120")),
+                               int(os.getenv("FAKE_SEED", "1")), float(os.getenv("FAKE_VARY", "0")),
+                               int(os.getenv("FAKE_CHAPTERS", "5")))
+    fake = FakeYouTube(channel, float(os.getenv("FAKE_LATENCY", "0.05")), int(os.getenv("FAKE_PORT", "8765")),
+                       float(os.getenv("FAKE_ERROR_RATE", "0")), float(os.getenv("FAKE_TOKEN_TTL", "3600")))
+    print(" ".join(f"{k}={v}" for k, v in fake.env().items()), flush=True)
+    fake.server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,19 @@
-import os, json, time, requests, pathlib
+# scripts/fetch_captions_api.py
+# Downloads each upload's best English caption track (Data API captions.list + captions.download,
+# OAuth) into captions/<id>.srt or captions/<id>.auto.srt, WORKERS videos at a time.
+#
+# captions/.manifest.json records the caption id and lastUpdated of every file written; a track
+# that hasn't changed since is not downloaded again. The manifest is checkpointed while the run
+# progresses, so an interrupted run picks up where it stopped. A failing video is reported and
+# skipped (its previous file and manifest entry stay). The access token is refreshed before it
+# expires and after any 401.
+
+import os, sys, json, time, pathlib, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import http_client
+from http_client import API_BASE, TOKEN_URL
+from index_io import write_json_atomic
+from profiling import PROF, run
 
 API_KEY   = os.environ["YOUTUBE_API_KEY"]
 CLIENT_ID = os.environ["YT_CLIENT_ID"]
@@ -7,17 +22,45 @@ REFRESH_TOKEN = os.environ["YT_REFRESH_TOKEN"]
 HANDLE    = os.getenv("YOUTUBE_HANDLE", "@blackoutapp")
 LANGS     = [l.strip().lower() for l in os.getenv("YOUTUBE_LANGS","en,en-US").split(",") if l.strip()]
 OUTDIR    = pathlib.Path("captions"); OUTDIR.mkdir(parents=True, exist_ok=True)
+MANIFEST  = os.getenv("CAPTIONS_MANIFEST", str(OUTDIR / ".manifest.json"))
+WORKERS   = int(os.getenv("WORKERS", "8"))
+CHECKPOINT_EVERY = int(os.getenv("CHECKPOINT_EVERY", "20"))
+TOKEN_MARGIN = 120  # seconds before expiry to renew the access token
 
-def token():
-    r = requests.post("https://oauth2.googleapis.com/token", data={
-        "client_id": CLIENT_ID, "client_secret": CLIENT_SECRET,
-        "refresh_token": REFRESH_TOKEN, "grant_type": "refresh_token",
-    }, timeout=30)
-    r.raise_for_status()
-    return r.json()["access_token"]
+class OAuthToken:
+    """Access token from the refresh token; renewed shortly before it expires, or after a 401."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.access, self.expires_at = None, 0.0
+
+    def _refresh(self):
+        r = http_client.post(TOKEN_URL, endpoint="oauth.token", data={
+            "client_id": CLIENT_ID, "client_secret": CLIENT_SECRET,
+            "refresh_token": REFRESH_TOKEN, "grant_type": "refresh_token",
+        }, timeout=30)
+        r.raise_for_status()
+        j = r.json()
+        self.access = j["access_token"]
+        ttl = float(j.get("expires_in", 3600))
+        self.expires_at = time.time() + ttl - min(TOKEN_MARGIN, ttl / 2)
+
+    def headers(self, stale=None):
+        """Authorization header; pass the rejected header as stale to force a refresh."""
+        with self.lock:
+            if self.access is None or time.time() >= self.expires_at or \
+               (stale and stale["Authorization"] == f"Bearer {self.access}"):
+                self._refresh()
+            return {"Authorization": f"Bearer {self.access}"}
+
+def authed_get(tok, url, **kw):
+    h = tok.headers()
+    r = http_client.get(url, headers=h, **kw)
+    if r.status_code == 401:
+        r = http_client.get(url, headers=tok.headers(stale=h), **kw)
+    return r
 
 def get_uploads_playlist_id():
-    r = requests.get("https://www.googleapis.com/youtube/v3/channels", params={
+    r = http_client.get(f"{API_BASE}/channels", params={
         "part": "contentDetails,snippet", "forHandle": HANDLE, "key": API_KEY
     }, timeout=30)
     r.raise_for_status()
@@ -29,7 +72,7 @@ def get_uploads_playlist_id():
 def iter_videos(uploads_id):
     page = None
     while True:
-        r = requests.get("https://www.googleapis.com/youtube/v3/playlistItems", params={
+        r = http_client.get(f"{API_BASE}/playlistItems", params={
             "part": "contentDetails,snippet", "playlistId": uploads_id,
             "maxResults": 50, "pageToken": page, "key": API_KEY
         }, timeout=30)
@@ -51,37 +94,90 @@ def best_track(tracks):
     auto   = [t for t in tracks if is_en(t["snippet"]) and t["snippet"].get("trackKind") == "ASR"]
     return (manual[0], False) if manual else ((auto[0], True) if auto else (None, False))
 
+# ---------- manifest ----------
+def load_manifest():
+    try:
+        with open(MANIFEST, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def write_text_atomic(path, text):
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(text, encoding="utf-8", errors="ignore")
+    os.replace(tmp, path)
+
+def fetch_video(tok, v, prev):
+    """
+    -> (status, manifest entry or None). status: "downloaded", "unchanged" or "none".
+    prev: this video's manifest entry from an earlier (possibly interrupted) run.
+    """
+    vid = v["id"]
+    r = authed_get(tok, f"{API_BASE}/captions", params={"part": "snippet", "videoId": vid},
+                   cache=0, timeout=30)
+    r.raise_for_status()
+    chosen, is_auto = best_track(r.json().get("items", []))
+    if not chosen:
+        return "none", None
+    updated = chosen["snippet"].get("lastUpdated")
+    path = OUTDIR / f"{vid}{'.auto.srt' if is_auto else '.srt'}"
+    entry = {"caption_id": chosen["id"], "last_updated": updated, "file": path.name}
+    if prev and updated and {k: prev.get(k) for k in entry} == entry and path.exists():
+        return "unchanged", prev
+
+    # download SRT (a track's content only changes with its lastUpdated)
+    r = authed_get(tok, f"{API_BASE}/captions/{chosen['id']}", endpoint="captions.download",
+                   params={"tfmt": "srt"}, timeout=60,
+                   cache=float("inf") if updated else http_client.CACHE_TTL, cache_vary=updated or "")
+    r.raise_for_status()
+    if not r.text.strip():
+        return "none", None
+    write_text_atomic(path, r.text)
+    if prev and prev.get("file") not in (None, path.name):
+        (OUTDIR / prev["file"]).unlink(missing_ok=True)  # manual track replaced an auto one, or vice versa
+    return "downloaded", {**entry, "fetched_at": int(time.time())}
+
 def main():
-    access = token()
-    headers = {"Authorization": f"Bearer {access}"}
+    tok = OAuthToken()
     uploads = get_uploads_playlist_id()
+    videos = list(iter_videos(uploads))
+    manifest = load_manifest()
+    counts = {"downloaded": 0, "unchanged": 0, "none": 0, "failed": 0}
+    failed = []
+    print(f"{len(videos)} videos, {len(manifest)} in manifest; WORKERS={WORKERS}")
 
-    # Save a playlist map for titles (used by build_index_from_srt.py)
-    with open("playlist.json","w",encoding="utf-8") as f:
-        json.dump({"entries": []}, f)
-
-    entries = []
-    for v in iter_videos(uploads):
-        vid = v["id"]; entries.append({"id": vid, "title": v["title"]})
-        # list caption tracks
-        r = requests.get("https://www.googleapis.com/youtube/v3/captions", params={
-            "part": "snippet", "videoId": vid
-        }, headers=headers, timeout=30)
-        r.raise_for_status()
-        items = r.json().get("items", [])
-        chosen, is_auto = best_track(items)
-        if not chosen:
-            continue
-        cap_id = chosen["id"]
-        # download SRT
-        r = requests.get(f"https://www.googleapis.com/youtube/v3/captions/{cap_id}",
-                         params={"tfmt":"srt"}, headers=headers, timeout=60)
-        if r.status_code == 200 and r.text.strip():
-            suffix = ".auto.srt" if is_auto else ".srt"
-            (OUTDIR / f"{vid}{suffix}").write_text(r.text, encoding="utf-8", errors="ignore")
-    # write playlist map
-    with open("playlist.json","w",encoding="utf-8") as f:
-        json.dump({"entries": entries}, f, ensure_ascii=False)
+    # videos finish in any order; the manifest is checkpointed every CHECKPOINT_EVERY of them,
+    # so an interrupted run resumes without re-downloading what it already has
+    done = 0
+    try:
+        with ThreadPoolExecutor(max_workers=WORKERS) as ex:
+            futs = {ex.submit(fetch_video, tok, v, manifest.get(v["id"])): v for v in videos}
+            for fut in as_completed(futs):
+                vid = futs[fut]["id"]
+                try:
+                    status, entry = fut.result()
+                except Exception as e:
+                    status, entry = "failed", manifest.get(vid)
+                    failed.append(vid)
+                    print(f"⚠️ {vid}: {e}")
+                counts[status] += 1
+                if entry:
+                    manifest[vid] = entry
+                else:
+                    manifest.pop(vid, None)
+                done += 1
+                if done % CHECKPOINT_EVERY == 0:
+                    write_json_atomic(MANIFEST, manifest)
+                    print(f"Processed {done}/{len(videos)}… {counts}")
+    finally:
+        write_json_atomic(MANIFEST, manifest)
+
+    # playlist map for titles (used by build_index_from_srt.py)
+    write_json_atomic("playlist.json", {"entries": videos})
+    print(f"✅ Captions: {counts}" + (f" | failed: {', '.join(failed)}" if failed else ""))
+    print(http_client.STATS.summary())
+    PROF.write_report(report_path=str(OUTDIR / "fetch.profile.json"), http=http_client.STATS.report())
+    return 1 if videos and counts["failed"] == len(videos) else 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(run(main))
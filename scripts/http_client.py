@@ -0,0 +1,282 @@
+# scripts/http_client.py
+# Shared HTTP layer for the YouTube fetchers:
+#   - one requests.Session per thread (keep-alive, pooled connections, no TLS handshake per call)
+#   - token-bucket rate limiting per host (HTTP_RATE requests/s, bursts up to HTTP_BURST)
+#   - jittered exponential backoff on 429/5xx and connection errors (honours Retry-After)
+#   - per-endpoint latency/error counters and latency histograms: STATS.summary(), STATS.snapshot()
+#   - optional on-disk response cache (HTTP_CACHE_DIR) for GETs made with cache=<ttl seconds>:
+#     fresh entries are served without a request, stale ones are revalidated with
+#     If-None-Match / If-Modified-Since when the server gave an ETag / Last-Modified (a 304 reuses
+#     the stored body), otherwise re-fetched. Oldest-used entries are evicted past HTTP_CACHE_MB.
+#
+# Base URLs can be pointed at a local stand-in server:
+#   YOUTUBE_API_BASE=http://127.0.0.1:8000/youtube/v3 TIMEDTEXT_URL=http://127.0.0.1:8000/api/timedtext
+
+import os, json, time, bisect, random, hashlib, tempfile, threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+API_BASE      = os.getenv("YOUTUBE_API_BASE", "https://www.googleapis.com/youtube/v3").rstrip("/")
+TIMEDTEXT_URL = os.getenv("TIMEDTEXT_URL", "https://www.youtube.com/api/timedtext")
+TOKEN_URL     = os.getenv("OAUTH_TOKEN_URL", "https://oauth2.googleapis.com/token")
+
+RATE         = float(os.getenv("HTTP_RATE", "10"))     # per host; 0 disables
+BURST        = int(os.getenv("HTTP_BURST", "10"))
+RETRIES      = int(os.getenv("HTTP_RETRIES", "4"))
+BACKOFF      = float(os.getenv("HTTP_BACKOFF", "0.5"))  # base delay (s); attempt n waits up to BACKOFF * 2**n
+MAX_BACKOFF  = 30.0
+POOL_SIZE    = int(os.getenv("HTTP_POOL", "4"))
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+CACHE_DIR    = os.getenv("HTTP_CACHE_DIR", "")           # empty disables the response cache
+CACHE_MB     = float(os.getenv("HTTP_CACHE_MB", "256"))
+CACHE_TTL    = float(os.getenv("HTTP_CACHE_TTL", "86400"))  # default ttl for callers; 0 = always revalidate
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate, self.burst = rate, max(1, burst)
+        self.tokens, self.stamp = float(self.burst), time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+HIST_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)  # bucket upper bounds; last bucket is +inf
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.cache = {"hits": 0, "revalidated": 0, "misses": 0, "bytes_saved": 0}
+
+    def record(self, name, seconds, error=False, retry=False):
+        with self.lock:
+            e = self.endpoints.setdefault(name, {"calls": 0, "errors": 0, "retries": 0, "total_s": 0.0, "max_s": 0.0,
+                                                 "hist": [0] * (len(HIST_MS) + 1)})
+            e["hist"][bisect.bisect_left(HIST_MS, seconds * 1000)] += 1
+            e["calls"] += 1
+            e["errors"] += int(error)
+            e["retries"] += int(retry)
+            e["total_s"] += seconds
+            e["max_s"] = max(e["max_s"], seconds)
+
+    def cache_event(self, kind, saved=0):
+        with self.lock:
+            self.cache[kind] += 1
+            self.cache["bytes_saved"] += saved
+
+    def snapshot(self):
+        with self.lock:
+            return {k: {**v, "hist": list(v["hist"])} for k, v in self.endpoints.items()}
+
+    def report(self):
+        """snapshot() plus histogram bounds and cache counters (for profiling reports)."""
+        with self.lock:
+            cache = dict(self.cache)
+        return {"hist_ms": list(HIST_MS), "endpoints": self.snapshot(), "cache": cache}
+
+    def summary(self):
+        lines = []
+        for name, e in sorted(self.snapshot().items()):
+            avg = e["total_s"] / e["calls"] * 1000 if e["calls"] else 0
+            lines.append(f"  {name:<22} calls:{e['calls']:<6} errors:{e['errors']:<4} retries:{e['retries']:<4} "
+                         f"avg:{avg:7.1f}ms  max:{e['max_s']*1000:7.1f}ms")
+        c = self.cache
+        if c["hits"] or c["revalidated"] or c["misses"]:
+            lines.append(f"  cache  hits:{c['hits']}  revalidated:{c['revalidated']}  misses:{c['misses']}  "
+                         f"saved:{c['bytes_saved'] / 1024:.1f} KiB")
+        return "HTTP:\n" + "\n".join(lines) if lines else "HTTP: no requests"
+
+STATS    = Stats()
+_buckets = {}
+_blk     = threading.Lock()
+_local   = threading.local()
+
+def bucket(host):
+    with _blk:
+        if host not in _buckets:
+            _buckets[host] = TokenBucket(RATE, BURST)
+        return _buckets[host]
+
+def session():
+    s = getattr(_local, "session", None)
+    if s is None:
+        s = _local.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        s.mount("https://", adapter); s.mount("http://", adapter)
+    return s
+
+def backoff_delay(attempt, retry_after=None):
+    delay = random.uniform(0, min(MAX_BACKOFF, BACKOFF * 2 ** attempt))
+    return max(delay, retry_after or 0)
+
+def _retry_after(r):
+    try:
+        return min(float(r.headers.get("Retry-After", "")), MAX_BACKOFF)
+    except ValueError:
+        return None
+
+# ---------- response cache ----------
+class ResponseCache:
+    """
+    One file per response under root/<key[:2]>/<key>: a JSON meta line, then the body.
+    meta = {"checked_at", "etag", "last_modified", "content_type", "encoding"}.
+    File mtime = last use, for eviction.
+    """
+    def __init__(self, root, max_bytes):
+        self.root, self.max_bytes = root, max_bytes
+        self.lock = threading.Lock()
+        self.total = sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        for d in os.scandir(self.root) if os.path.isdir(self.root) else ():
+            if d.is_dir():
+                for e in os.scandir(d.path):
+                    if not e.name.startswith("."):
+                        st = e.stat()
+                        yield st.st_mtime, st.st_size, e.path
+
+    @staticmethod
+    def key(method, url, params=None, vary=""):
+        items = sorted((k, str(v)) for k, v in (params or {}).items() if v is not None)
+        return hashlib.sha1(json.dumps([method, url, items, vary]).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def load(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                meta = json.loads(f.readline())
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None
+
+    def touch(self, key):
+        try: os.utime(self._path(key))
+        except OSError: pass
+
+    def store(self, key, meta, body):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(meta).encode("utf-8") + b"\n")
+                f.write(body)
+            try: old = os.path.getsize(path)
+            except OSError: old = 0
+            os.replace(tmp, path)
+        except BaseException:
+            try: os.unlink(tmp)
+            except OSError: pass
+            raise
+        with self.lock:
+            self.total += os.path.getsize(path) - old
+            if self.total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries down to 90% of max_bytes (caller holds the lock)."""
+        for _, size, path in sorted(self._entries()):
+            if self.total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.unlink(path)
+                self.total -= size
+            except OSError:
+                pass
+
+_cache = None
+
+def response_cache():
+    global _cache
+    if _cache is None and CACHE_DIR:
+        with _blk:
+            if _cache is None:
+                _cache = ResponseCache(CACHE_DIR, CACHE_MB * 1024 * 1024)
+    return _cache
+
+def _from_cache(url, meta, body):
+    r = requests.Response()
+    r.status_code, r.url, r._content = 200, url, body
+    if meta.get("content_type"):
+        r.headers["Content-Type"] = meta["content_type"]
+    r.encoding = meta.get("encoding")
+    return r
+
+# ---------- requests ----------
+def _send(method, url, name, **kw):
+    limiter = bucket(urlsplit(url).netloc)
+    for attempt in range(RETRIES + 1):
+        limiter.acquire()
+        t0 = time.perf_counter()
+        try:
+            r = session().request(method, url, **kw)
+        except (requests.ConnectionError, requests.Timeout):
+            STATS.record(name, time.perf_counter() - t0, error=True, retry=attempt < RETRIES)
+            if attempt == RETRIES:
+                raise
+            time.sleep(backoff_delay(attempt))
+            continue
+        retry = r.status_code in RETRY_STATUS and attempt < RETRIES
+        STATS.record(name, time.perf_counter() - t0, error=r.status_code >= 400, retry=retry)
+        if not retry:
+            return r
+        time.sleep(backoff_delay(attempt, _retry_after(r)))
+
+def request(method, url, endpoint=None, cache=None, cache_vary="", **kw):
+    """
+    requests.request with pooling, rate limiting and retries. Returns the final Response (any status).
+    cache: seconds a stored GET response may be reused without asking the server (needs
+    HTTP_CACHE_DIR); cache_vary: extra cache-key text, e.g. a version the caller already knows.
+    """
+    kw.setdefault("timeout", 30)
+    parts = urlsplit(url)
+    name = endpoint or parts.path.rstrip("/").rsplit("/", 1)[-1] or parts.netloc
+    rc = response_cache() if cache is not None and method == "GET" else None
+    if rc is None:
+        return _send(method, url, name, **kw)
+
+    key = rc.key(method, url, kw.get("params"), cache_vary)
+    entry = rc.load(key)
+    if entry:
+        meta, body = entry
+        if time.time() - meta["checked_at"] < cache:
+            rc.touch(key)
+            STATS.cache_event("hits", len(body))
+            return _from_cache(url, meta, body)
+        validators = {k: meta[m] for k, m in (("If-None-Match", "etag"), ("If-Modified-Since", "last_modified")) if meta.get(m)}
+        if validators:
+            kw["headers"] = {**(kw.get("headers") or {}), **validators}
+
+    r = _send(method, url, name, **kw)
+    if r.status_code == 304 and entry:
+        meta["checked_at"] = time.time()
+        rc.store(key, meta, body)
+        STATS.cache_event("revalidated", len(body))
+        return _from_cache(url, meta, body)
+    if r.status_code == 200:
+        rc.store(key, {"checked_at": time.time(), "etag": r.headers.get("ETag"),
+                       "last_modified": r.headers.get("Last-Modified"),
+                       "content_type": r.headers.get("Content-Type"), "encoding": r.encoding}, r.content)
+    STATS.cache_event("misses")
+    return r
+
+def get(url, **kw):
+    return request("GET", url, **kw)
+
+def post(url, **kw):
+    return request("POST", url, **kw)
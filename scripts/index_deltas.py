@@ -0,0 +1,174 @@
+# scripts/index_deltas.py
+# Per-build deltas of public/index.json, so a client holding an older copy fetches only what changed
+# (written with DELTAS=1):
+#
+#   deltas/manifest.json        {"generated_at", "index_bytes", "deltas": [{"from", "to", "file", "bytes", ...}]}
+#   deltas/<from>-<to>.json     {"from", "to", "meta", "added", "changed", "removed"}
+#   deltas/state.json           builder state: generated_at + a digest per video of the last build
+#
+# "added"/"changed" hold whole videos, {"video": {...}, "segments": [{"start", "text", "src"}, ...]}
+# ("norm" and "video_id" are re-derived on load); "removed" is a list of video ids; "meta" holds the
+# index-level keys (generated_at, channel, config, ...). Videos are compared by digest, so a video
+# whose segments didn't change costs nothing.
+#
+# Compaction: the manifest keeps a chain of consecutive deltas, oldest dropped first while there
+# are more than DELTA_KEEP of them or they add up to more than DELTA_MAX_RATIO of index.json;
+# a client older than the chain (or whose part of it isn't smaller than index.json) just fetches
+# index.json. Delta files are deleted one generation after they leave the manifest.
+#
+# Reading: DeltaLoader("public" or "https://.../public", "~/.cache/index.json").load()
+
+import os, re, json, hashlib, urllib.request
+from index_io import write_json_atomic
+
+DELTA_KEEP      = int(os.getenv("DELTA_KEEP", "28"))
+DELTA_MAX_RATIO = float(os.getenv("DELTA_MAX_RATIO", "0.5"))
+DELTA_NAME_RE   = re.compile(r"^\d+-\d+\.json$")
+
+def _rows(segs):
+    return [{k: s[k] for k in ("start", "text", "src") if k in s} for s in segs]
+
+def _segments(rows, video_id):
+    out = []
+    for r in rows:
+        s = {"start": r["start"], "text": r["text"], "norm": r["text"].lower()}
+        if "src" in r:
+            s["src"] = r["src"]
+        s["video_id"] = video_id
+        out.append(s)
+    return out
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+# ---------- write ----------
+class DeltaWriter:
+    """Fed by index_io.IndexWriter: videos are compared with the previous build as they arrive, files written on close()."""
+    def __init__(self, delta_dir):
+        self.dir = delta_dir
+        self.previous = _read_json(os.path.join(delta_dir, "manifest.json"))
+        self.state = _read_json(os.path.join(delta_dir, "state.json"))
+        self.prev_digests = self.state.get("videos")
+        self.digests, self.added, self.changed = {}, [], []
+
+    def add_video(self, video, segs):
+        entry = {"video": video, "segments": _rows(segs)}
+        digest = hashlib.sha1(json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8")).hexdigest()[:16]
+        self.digests[video["id"]] = digest
+        if self.prev_digests is None:  # first build with deltas: nothing to compare against
+            return
+        old = self.prev_digests.get(video["id"])
+        if old is None:
+            self.added.append(entry)
+        elif old != digest:
+            self.changed.append(entry)
+
+    def close(self, meta, index_bytes):
+        """meta: index-level keys (generated_at, channel, ...); index_bytes: size of the published index.json."""
+        generated_at = meta.get("generated_at")
+        chain = list(self.previous.get("deltas", []))
+        if self.prev_digests is not None and self.state.get("generated_at") != generated_at:
+            removed = [vid for vid in self.prev_digests if vid not in self.digests]
+            frm = self.state["generated_at"]
+            name = f"{frm}-{generated_at}.json"
+            path = os.path.join(self.dir, name)
+            write_json_atomic(path, {"from": frm, "to": generated_at, "meta": meta, "added": self.added,
+                                     "changed": self.changed, "removed": removed}, compact=True)
+            chain.append({"from": frm, "to": generated_at, "file": name, "bytes": os.path.getsize(path),
+                          "added": len(self.added), "changed": len(self.changed), "removed": len(removed)})
+        else:
+            chain = []  # no previous build to diff against: clients start over from index.json
+
+        # compaction: only the newest deltas, and never more bytes than fetching index.json would cost
+        while chain and (len(chain) > DELTA_KEEP or sum(d["bytes"] for d in chain) > DELTA_MAX_RATIO * index_bytes):
+            chain.pop(0)
+        manifest = {"version": 1, "generated_at": generated_at, "index_bytes": index_bytes, "deltas": chain}
+        write_json_atomic(os.path.join(self.dir, "manifest.json"), manifest)  # publishes this generation
+        write_json_atomic(os.path.join(self.dir, "state.json"), {"generated_at": generated_at, "videos": self.digests},
+                          compact=True)
+
+        # drop deltas referenced by neither this nor the previous manifest
+        keep = {d["file"] for d in chain} | {d["file"] for d in self.previous.get("deltas", [])}
+        for name in os.listdir(self.dir):
+            if DELTA_NAME_RE.match(name) and name not in keep:
+                os.unlink(os.path.join(self.dir, name))
+
+# ---------- read ----------
+def apply_delta(index, delta):
+    """Return index (an index.json dict) with delta applied; videos keep their place, new ones go last."""
+    if index.get("generated_at") != delta["from"]:
+        raise ValueError(f"delta {delta['from']}-{delta['to']} does not apply to {index.get('generated_at')}")
+    videos = {v["id"]: v for v in index["videos"]}
+    by_vid = {}
+    for s in index["segments"]:
+        by_vid.setdefault(s.get("video_id"), []).append(s)
+    for vid in delta["removed"]:
+        videos.pop(vid, None); by_vid.pop(vid, None)
+    for e in delta["changed"] + delta["added"]:
+        vid = e["video"]["id"]
+        videos[vid] = e["video"]
+        by_vid[vid] = _segments(e["segments"], vid)
+    out = dict(delta["meta"])
+    out["segments"] = [s for vid in videos for s in by_vid.pop(vid, [])]
+    out["segments"] += [s for segs in by_vid.values() for s in segs]  # segments of videos not listed in "videos"
+    out["videos"] = list(videos.values())
+    return out
+
+class DeltaLoader:
+    """
+    Client side: keeps a local copy of index.json (cache_path) current, from a local dir or http(s) base
+    holding index.json and deltas/. bytes counts everything fetched.
+    """
+    def __init__(self, base, cache_path):
+        self.base = base.rstrip("/")
+        self.cache_path = cache_path
+        self.bytes = 0
+
+    def _fetch(self, rel):
+        if self.base.startswith(("http://", "https://")):
+            with urllib.request.urlopen(f"{self.base}/{rel}", timeout=30) as r:
+                data = r.read()
+        else:
+            with open(os.path.join(self.base, rel), "rb") as f:
+                data = f.read()
+        self.bytes += len(data)
+        return json.loads(data)
+
+    def chain(self, manifest, generated_at):
+        """Deltas leading from generated_at to the manifest's generation, or None if it isn't covered."""
+        by_from = {d["from"]: d for d in manifest.get("deltas", [])}
+        out = []
+        while generated_at != manifest["generated_at"]:
+            d = by_from.get(generated_at)
+            if d is None:
+                return None
+            out.append(d)
+            generated_at = d["to"]
+        return out
+
+    def load(self):
+        cached = _read_json(self.cache_path) or None
+        index = None
+        try:
+            manifest = self._fetch("deltas/manifest.json")
+        except (OSError, ValueError):
+            manifest = None
+        if cached and manifest:
+            if cached.get("generated_at") == manifest["generated_at"]:
+                return cached
+            chain = self.chain(manifest, cached.get("generated_at"))
+            if chain is not None and sum(d["bytes"] for d in chain) < manifest["index_bytes"]:
+                try:
+                    index = cached
+                    for d in chain:
+                        index = apply_delta(index, self._fetch(f"deltas/{d['file']}"))
+                except (OSError, ValueError, KeyError):
+                    index = None  # a delta went missing or didn't fit: start over from index.json
+        if index is None:
+            index = self._fetch("index.json")
+        write_json_atomic(self.cache_path, index, compact=True)
+        return index
@@ -0,0 +1,201 @@
+# scripts/index_io.py
+# Shared output step for all builders: writes public/index.json and its derived artifacts.
+#
+#   index.json     full index (unchanged format)
+#   inverted.json  term -> postings (see inverted_index.py; INVERTED=0 skips it)
+#   shards/        manifest + per-video / per-term-range shards (SHARDED=1, see index_shards.py)
+#   segments.bin   compact columnar copy of "segments" (COMPACT=1, see segment_store.py)
+#   deltas/        changes since the previous build, for clients holding an older copy (DELTAS=1, see index_deltas.py)
+#   vectors.npy    embeddings of caption windows for semantic search (EMBED=1, needs numpy; see semantic.py)
+#   index.stats.json  video/segment/byte counts of the published index.json (see validate_index.py)
+#
+# IndexWriter streams: each video's segments are serialized as soon as the builder hands them
+# over, so memory holds counters and compact postings rather than every segment dict.
+# Every file is written to a temp file in the same directory and renamed into place on close(),
+# so readers never observe a half-written file. Videos and segments are checked as they are added
+# (VALIDATE=0 skips it); if the result is malformed or shrank too far against the published
+# index, close() raises IndexValidationError and nothing is replaced.
+
+import os, json, shutil, tempfile
+from inverted_index import PostingsBuilder
+from profiling import PROF
+from validate_index import Checker, gate, stats_path
+
+INVERTED = os.getenv("INVERTED", "1") == "1"
+SHARDED  = os.getenv("SHARDED", "0") == "1"
+COMPACT  = os.getenv("COMPACT", "0") == "1"
+DELTAS   = os.getenv("DELTAS", "0") == "1"
+EMBED    = os.getenv("EMBED", "0") == "1"
+VALIDATE = os.getenv("VALIDATE", "1") == "1"
+
+def _tempfile(path, mode):
+    d = os.path.dirname(path) or "."
+    os.makedirs(d, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=d, prefix=".tmp-", suffix=os.path.splitext(path)[1])
+    os.chmod(tmp, 0o644)  # mkstemp creates 0600; published files must stay world-readable
+    return tmp, os.fdopen(fd, mode, **({"encoding": "utf-8"} if "b" not in mode else {}))
+
+def _unlink(path):
+    try: os.unlink(path)
+    except OSError: pass
+
+def write_json_atomic(path, obj, compact=False):
+    tmp, f = _tempfile(path, "w")
+    try:
+        with f:
+            f.write(json.dumps(obj, ensure_ascii=False, separators=(",", ":") if compact else None))
+        os.replace(tmp, path)
+    except BaseException:
+        _unlink(tmp)
+        raise
+
+def _key(k):
+    return json.dumps(k, ensure_ascii=False) + ": "
+
+class IndexWriter:
+    """
+    with IndexWriter("public/index.json", {"generated_at": ..., "channel": ...}) as w:
+        w.add(video, segments)            # once per video, in any order
+        ...
+        w.trailer["config"] = {...}       # keys only known at the end (counts, config)
+    Leaving the block without an exception publishes; with one, nothing is replaced.
+    """
+    def __init__(self, path, header):
+        self.path, self.out_dir = path, os.path.dirname(path) or "."
+        self.header, self.trailer = dict(header), {}
+        self.n_videos = self.n_segments = 0
+        self._tmp, self._f = _tempfile(path, "w")
+        self._videos = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self.postings = PostingsBuilder() if INVERTED or SHARDED else None
+        self.checker = Checker() if VALIDATE else None
+        self.shards = self.store = self.deltas = self.vectors = None
+        if SHARDED:
+            from index_shards import ShardWriter
+            self.shards = ShardWriter(os.path.join(self.out_dir, "shards"))
+        if COMPACT:
+            from segment_store import SegmentStoreWriter
+            self.store = SegmentStoreWriter()
+        if DELTAS:
+            from index_deltas import DeltaWriter
+            self.deltas = DeltaWriter(os.path.join(self.out_dir, "deltas"))
+        if EMBED:
+            from semantic import VectorWriter, np
+            if np is None:
+                print("⚠️ EMBED=1 but numpy is not installed: skipping vectors.npy")
+            else:
+                self.vectors = VectorWriter(self.out_dir)
+        if self.checker:
+            for k, v in self.header.items():
+                self.checker.key(k, v)
+        self._f.write("{" + "".join(_key(k) + json.dumps(v, ensure_ascii=False) + ", " for k, v in self.header.items())
+                      + _key("segments") + "[")
+
+    @PROF.timed("index.add")
+    def add(self, video, segs):
+        if segs:
+            self._f.write((", " if self.n_segments else "")
+                          + ", ".join(json.dumps(s, ensure_ascii=False) for s in segs))
+        self._videos.write((", " if self.n_videos else "") + json.dumps(video, ensure_ascii=False))
+        seg_start = self.n_segments
+        if self.checker:
+            for s in segs:
+                self.checker.segment(s)
+            self.checker.video(video)
+        if self.postings:
+            for s in segs:
+                self.postings.add(s.get("norm") or s.get("text") or "", (video["id"], s.get("src")))
+        self.n_segments += len(segs)
+        self.n_videos += 1
+        if self.shards:
+            self.shards.add_video(video, segs, seg_start)
+        if self.store:
+            self.store.add(segs)
+        if self.deltas:
+            self.deltas.add_video(video, segs)
+        if self.vectors:
+            with PROF.stage("embed"):
+                self.vectors.add_video(video, segs, seg_start)
+
+    @PROF.timed("index.close")
+    def close(self):
+        generated_at = self.header.get("generated_at")
+        self._f.write("], " + _key("videos") + "[")
+        self._videos.seek(0)
+        shutil.copyfileobj(self._videos, self._f)
+        self._f.write("]" + "".join(", " + _key(k) + json.dumps(v, ensure_ascii=False) for k, v in self.trailer.items()) + "}")
+        self._f.close(); self._videos.close()
+        stats = None
+        if self.checker:
+            for k, v in [("segments", []), ("videos", []), *self.trailer.items()]:
+                self.checker.key(k, v)
+            try:
+                with PROF.stage("validate"):
+                    stats = gate(self.path, *self.checker.finish(os.path.getsize(self._tmp)), self.path)
+            except BaseException:
+                _unlink(self._tmp)
+                if self.store:
+                    self.store.close()
+                raise
+
+        # all temp files first, then rename them in one go, index.json last: a reader that
+        # reloads when index.json changes finds the files of the same build next to it
+        done = []
+        try:
+            if INVERTED:
+                tmp, f = _tempfile(os.path.join(self.out_dir, "inverted.json"), "w")
+                done.append((tmp, os.path.join(self.out_dir, "inverted.json")))
+                with f:
+                    self.postings.write(f, generated_at)
+            if self.store:
+                tmp, f = _tempfile(os.path.join(self.out_dir, "segments.bin"), "wb")
+                done.append((tmp, os.path.join(self.out_dir, "segments.bin")))
+                with f:
+                    self.store.write(f, generated_at)
+                self.store.close()
+            if self.vectors:
+                with PROF.stage("embed"):
+                    self.vectors.finish()
+                    for name, mode, write in (("vectors.npy", "wb", self.vectors.write_npy),
+                                              ("vectors.json", "w", self.vectors.write_meta)):
+                        path = os.path.join(self.out_dir, name)
+                        tmp, f = _tempfile(path, mode)
+                        done.append((tmp, path))
+                        with f:
+                            write(f, generated_at)
+        except BaseException:
+            for tmp, _ in done + [(self._tmp, self.path)]: _unlink(tmp)
+            raise
+        for tmp, path in done + [(self._tmp, self.path)]:
+            os.replace(tmp, path)
+        if stats:
+            write_json_atomic(stats_path(self.path), {"generated_at": generated_at, **stats})
+        if self.shards:
+            self.shards.close({**self.header, **self.trailer}, self.n_segments, self.postings.items())
+        if self.deltas:
+            self.deltas.close({**self.header, **self.trailer}, os.path.getsize(self.path))
+
+    def abort(self):
+        self._f.close(); self._videos.close()
+        _unlink(self._tmp)
+        if self.store:
+            self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def publish(out, path="public/index.json"):
+    """Write an in-memory index dict (generated_at, videos, segments, ...) through IndexWriter."""
+    by_vid = {}
+    for s in out["segments"]:
+        by_vid.setdefault(s["video_id"], []).append(s)
+    with IndexWriter(path, {k: v for k, v in out.items() if k not in ("videos", "segments")}) as w:
+        for v in out["videos"]:
+            w.add(v, by_vid.pop(v["id"], []))
+        for vid, segs in by_vid.items():
+            w.add({"id": vid}, segs)
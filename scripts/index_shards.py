@@ -0,0 +1,149 @@
+# scripts/index_shards.py
+# Sharded, lazily-loadable form of public/index.json:
+#
+#   shards/manifest.json              small: channel/config, videos (+ their shard and segment id range),
+#                                     term dictionary ranges (first/last term of each term shard)
+#   shards/videos/<id>.<hash>.json    one video's segments: [{"start", "text", "src"}, ...]
+#   shards/terms/<n>.<hash>.json      a contiguous, sorted range of inverted.json's "terms"
+#
+# Shard names carry a content hash, so an existing shard is never rewritten in place; the manifest
+# is replaced atomically after all shards exist. A reader holding the previous manifest can still
+# fetch the shards it references: they are only garbage-collected one generation later.
+#
+# Reading: ShardedIndex("public/shards") or ShardedIndex("https://.../shards").search("fader page")
+
+import os, re, json, bisect, hashlib, tempfile, urllib.request
+from index_io import write_json_atomic
+from inverted_index import InvertedIndex, tokenize
+
+TERM_SHARD_BYTES = int(os.getenv("TERM_SHARD_BYTES", "65536"))
+SHARD_NAME_RE    = re.compile(r"\.[0-9a-f]{12}\.json$")
+
+# ---------- write ----------
+def _write_shard(shard_dir, stem, obj):
+    """Write obj as <stem>.<hash>.json (skipped if that exact content already exists); return relative path."""
+    data = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    rel = f"{stem}.{hashlib.sha1(data).hexdigest()[:12]}.json"
+    path = os.path.join(shard_dir, rel)
+    if not os.path.exists(path):
+        d = os.path.dirname(path)
+        os.makedirs(d, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=d, prefix=".tmp-")
+        os.chmod(tmp, 0o644)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return rel
+
+def _read_manifest(shard_dir):
+    try:
+        with open(os.path.join(shard_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _manifest_shards(m):
+    return {v["shard"] for v in m.get("videos", [])} | {t["shard"] for t in m.get("terms", [])}
+
+class ShardWriter:
+    """Fed by index_io.IndexWriter: video shards are written as videos arrive, term shards + manifest on close()."""
+    def __init__(self, shard_dir):
+        self.dir = shard_dir
+        self.previous = _read_manifest(shard_dir)
+        self.videos = []
+
+    def add_video(self, video, segs, seg_start):
+        # postings use global segment ids, so each video records its id range
+        rows = [{k: s[k] for k in ("start", "text", "src") if k in s} for s in segs]
+        shard = _write_shard(self.dir, f"videos/{video['id']}", {"video_id": video["id"], "segments": rows})
+        self.videos.append({**video, "shard": shard, "seg_start": seg_start, "seg_count": len(segs)})
+
+    def close(self, meta, n_segments, term_items):
+        """meta: index-level keys (generated_at, channel, ...); term_items: sorted (term, postings) pairs."""
+        # term-range shards of roughly TERM_SHARD_BYTES each
+        term_shards, chunk, size = [], {}, 0
+        def flush():
+            if chunk:
+                first, last = next(iter(chunk)), next(reversed(chunk))
+                rel = _write_shard(self.dir, f"terms/{len(term_shards):04d}", chunk)
+                term_shards.append({"first": first, "last": last, "shard": rel})
+        for t, postings in term_items:
+            chunk[t] = postings
+            size += len(t) + 8 * sum(len(p) for p in postings)
+            if size >= TERM_SHARD_BYTES:
+                flush(); chunk, size = {}, 0
+        flush()
+
+        manifest = dict(meta)
+        manifest.update({"version": 1, "segments": n_segments, "videos": self.videos, "terms": term_shards})
+        write_json_atomic(os.path.join(self.dir, "manifest.json"), manifest)  # last: publishes this generation
+
+        # drop shards referenced by neither this nor the previous manifest
+        keep = _manifest_shards(manifest) | _manifest_shards(self.previous)
+        for sub in ("videos", "terms"):
+            d = os.path.join(self.dir, sub)
+            for name in os.listdir(d) if os.path.isdir(d) else []:
+                if SHARD_NAME_RE.search(name) and f"{sub}/{name}" not in keep:
+                    os.unlink(os.path.join(d, name))
+
+# ---------- read ----------
+class ShardedIndex:
+    """Loads the manifest up front and fetches video/term shards on demand (local dir or http(s) base)."""
+    def __init__(self, base, cache=True):
+        self.base = base.rstrip("/")
+        self.cache = cache
+        self.manifest = self._fetch("manifest.json")
+        self.videos = self.manifest["videos"]
+        self._by_id = {v["id"]: v for v in self.videos}
+        self._seg_starts = [v["seg_start"] for v in self.videos]
+        self._term_firsts = [t["first"] for t in self.manifest["terms"]]
+        self._cache = {}
+
+    def _fetch(self, rel):
+        if self.base.startswith(("http://", "https://")):
+            with urllib.request.urlopen(f"{self.base}/{rel}", timeout=30) as r:
+                return json.load(r)
+        with open(os.path.join(self.base, rel), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _shard(self, rel):
+        if not self.cache:
+            return self._fetch(rel)
+        if rel not in self._cache:
+            self._cache[rel] = self._fetch(rel)
+        return self._cache[rel]
+
+    def __contains__(self, video_id):
+        """True if the manifest lists video_id (no shard is fetched)."""
+        return video_id in self._by_id
+
+    def video_segments(self, video_id):
+        v = self._by_id.get(video_id)
+        return self._shard(v["shard"])["segments"] if v else []
+
+    def segment(self, seg_id):
+        v = self.videos[bisect.bisect_right(self._seg_starts, seg_id) - 1]
+        return {**self._shard(v["shard"])["segments"][seg_id - v["seg_start"]], "video_id": v["id"]}
+
+    def _terms_between(self, lo, hi):
+        """All terms t with lo <= t <= hi, loading only the term shards whose range overlaps."""
+        shards = self.manifest["terms"]
+        i = max(bisect.bisect_right(self._term_firsts, lo) - 1, 0)
+        out = {}
+        while i < len(shards) and shards[i]["first"] <= hi:
+            if shards[i]["last"] >= lo:
+                out.update((t, p) for t, p in self._shard(shards[i]["shard"]).items() if lo <= t <= hi)
+            i += 1
+        return out
+
+    def search(self, q):
+        """Same query syntax as InvertedIndex.search; returns segment dicts with video_id."""
+        q = q.strip()
+        if q.endswith("*") and " " not in q:
+            p = q[:-1].lower()
+            terms = self._terms_between(p, p + "\uffff")
+        else:
+            terms = {}
+            for t in tokenize(q):
+                terms.update(self._terms_between(t, t))
+        return [self.segment(i) for i in InvertedIndex(terms).search(q)]
@@ -0,0 +1,167 @@
+# scripts/inverted_index.py
+# Token -> postings index over the "segments" list of public/index.json.
+#
+#   public/inverted.json = {
+#     "generated_at": <same as index.json>,
+#     "segments": <number of segments indexed>,
+#     "lengths": [tokens in segment 0, tokens in segment 1, ...],
+#     "runs": [seg_id, ...],
+#     "terms": {"fader": [[seg_id, pos, pos, ...], ...], ...}
+#   }
+#
+# seg_id is the position of the segment in index.json's "segments" list, pos the token
+# offset inside that segment's norm (used for phrase queries). Postings are sorted by seg_id.
+# lengths and runs are the build-time statistics ranking.py needs: segment lengths for BM25, and
+# the seg_ids where a new run of consecutive segments (same video and src) begins, so a phrase
+# split across caption lines can be matched over adjacent segments.
+#
+# Usage: python scripts/inverted_index.py "fader page"     (phrase query against public/)
+
+import re, sys, json, bisect
+from array import array
+
+TOKEN_RE = re.compile(r"\w+(?:'\w+)*")
+
+def tokenize(norm):
+    return TOKEN_RE.findall(norm.lower())
+
+# ---------- build ----------
+class PostingsBuilder:
+    """
+    Incremental build of "terms": add() one segment at a time (seg ids are assigned in order).
+    Postings are held as flat uint32 arrays [seg_id, n, pos_1..pos_n, ...], ~4 bytes per token.
+    run identifies the sequence a segment belongs to (e.g. (video_id, src)); a change starts a new run.
+    """
+    def __init__(self):
+        self._terms = {}
+        self.n_segments = 0
+        self.lengths, self.runs = array("I"), array("I")
+        self._run = object()
+
+    def add(self, norm, run=None):
+        seg_id = self.n_segments
+        self.n_segments += 1
+        if run != self._run:
+            self.runs.append(seg_id)
+            self._run = run
+        toks = tokenize(norm)
+        self.lengths.append(len(toks))
+        local = {}
+        for pos, tok in enumerate(toks):
+            local.setdefault(tok, []).append(pos)
+        for tok, positions in local.items():
+            a = self._terms.get(tok)
+            if a is None:
+                a = self._terms[tok] = array("I")
+            a.append(seg_id); a.append(len(positions)); a.extend(positions)
+        return seg_id
+
+    def items(self):
+        """(term, [[seg_id, pos, ...], ...]) in term order."""
+        for t in sorted(self._terms):
+            a, out, i = self._terms[t], [], 0
+            while i < len(a):
+                n = a[i + 1]
+                out.append([a[i], *a[i + 2:i + 2 + n]])
+                i += 2 + n
+            yield t, out
+
+    def write(self, f, generated_at):
+        """Serialize as inverted.json to the text file f, one term at a time."""
+        f.write(f'{{"generated_at":{json.dumps(generated_at)},"segments":{self.n_segments},'
+                f'"lengths":{json.dumps(self.lengths.tolist())},"runs":{json.dumps(self.runs.tolist())},"terms":{{')
+        for i, (t, postings) in enumerate(self.items()):
+            f.write(("," if i else "") + json.dumps(t, ensure_ascii=False) + ":" + json.dumps(postings, separators=(",", ":")))
+        f.write("}}")
+
+def build_inverted_index(segments):
+    b = PostingsBuilder()
+    for s in segments:
+        b.add(s.get("norm") or s.get("text") or "", (s.get("video_id"), s.get("src")))
+    return b
+
+# ---------- query ----------
+class InvertedIndex:
+    def __init__(self, terms, generated_at=None, n_segments=0, lengths=None, runs=None):
+        self.terms = terms
+        self.vocab = sorted(terms)
+        self.generated_at = generated_at
+        self.n_segments = n_segments
+        self.lengths, self.runs = lengths, runs  # None when loaded from an inverted.json without them
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            j = json.load(f)
+        return cls(j["terms"], j.get("generated_at"), j.get("segments", 0), j.get("lengths"), j.get("runs"))
+
+    @classmethod
+    def from_segments(cls, segments, generated_at=None):
+        b = build_inverted_index(segments)
+        return cls(dict(b.items()), generated_at, len(segments), b.lengths.tolist(), b.runs.tolist())
+
+    def term(self, t):
+        """Segment ids containing token t."""
+        return [p[0] for p in self.terms.get(t.lower(), ())]
+
+    def prefix_terms(self, p):
+        p = p.lower()
+        i = bisect.bisect_left(self.vocab, p)
+        out = []
+        while i < len(self.vocab) and self.vocab[i].startswith(p):
+            out.append(self.vocab[i]); i += 1
+        return out
+
+    def prefix(self, p):
+        """Segment ids containing any token starting with p."""
+        ids = set()
+        for t in self.prefix_terms(p):
+            ids.update(x[0] for x in self.terms[t])
+        return sorted(ids)
+
+    def phrase(self, q):
+        """Segment ids where the tokens of q appear consecutively."""
+        toks = tokenize(q)
+        if not toks:
+            return []
+        lists = [self.terms.get(t) for t in toks]
+        if not all(lists):
+            return []
+        if len(toks) == 1:
+            return [p[0] for p in lists[0]]
+        # walk the rarest term's postings, binary-search the others (postings are sorted by seg_id)
+        rarest = min(range(len(toks)), key=lambda i: len(lists[i]))
+        out = []
+        for cand in lists[rarest]:
+            seg_id, found = cand[0], []
+            for postings in lists:
+                j = bisect.bisect_left(postings, seg_id, key=lambda p: p[0])
+                if j == len(postings) or postings[j][0] != seg_id:
+                    break
+                found.append(postings[j])
+            else:
+                following = [set(p[1:]) for p in found]
+                if any(all(p + k in following[k] for k in range(1, len(toks))) for p in found[0][1:]):
+                    out.append(seg_id)
+        return out
+
+    def search(self, q):
+        """Phrase match for multi-word q, prefix match for a single trailing '*', else term match."""
+        q = q.strip()
+        if q.endswith("*") and " " not in q:
+            return self.prefix(q[:-1])
+        return self.phrase(q)
+
+def main():
+    q = " ".join(sys.argv[1:])
+    if not q:
+        raise SystemExit('usage: inverted_index.py "query"')
+    idx = InvertedIndex.load("public/inverted.json")
+    with open("public/index.json", "r", encoding="utf-8") as f:
+        segments = json.load(f)["segments"]
+    for seg_id in idx.search(q):
+        s = segments[seg_id]
+        print(f'https://youtu.be/{s["video_id"]}?t={int(s["start"])}  {s["text"][:100]}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# scripts/parse_pool.py
+# Caption parsing / segment building in worker processes, so CPU-heavy work on big caption
+# trees is not serialized behind one GIL.
+#
+#   PARSE_PROCS=0   parse in the calling thread (default)
+#   PARSE_PROCS=N   N worker processes; PARSE_BATCH files per task for parse_files()
+#
+# Workers send segments back packed as columns, (starts, texts, srcs) with texts/srcs joined
+# by "\n" (normalized text never contains one), instead of a list of dicts: a few large
+# objects pickle far faster than thousands of small ones. "norm" and "video_id" are
+# re-derived on the parent side by unpack().
+
+import os, multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from captions import parse_caption_file
+from profiling import PROF
+
+PARSE_PROCS = int(os.getenv("PARSE_PROCS", "0"))
+PARSE_BATCH = int(os.getenv("PARSE_BATCH", "16"))
+
+def pack(segs):
+    return ([s["start"] for s in segs], "\n".join(s["text"] for s in segs), "\n".join(s["src"] for s in segs))
+
+def unpack(packed, video_id):
+    starts, texts, srcs = packed
+    if not starts:
+        return []
+    return [{"start": st, "text": t, "norm": t.lower(), "src": src, "video_id": video_id}
+            for st, t, src in zip(starts, texts.split("\n"), srcs.split("\n"))]
+
+def pool(procs=PARSE_PROCS):
+    """
+    A ProcessPoolExecutor, or None when parsing should stay in-process. Workers are spawned,
+    not forked: the builders have HTTP threads running and forking those is unsafe.
+    """
+    return ProcessPoolExecutor(max_workers=procs, mp_context=multiprocessing.get_context("spawn")) if procs > 0 else None
+
+def _parse_batch(batch):
+    return [pack(parse_caption_file(path, src)) for _, path, src in batch]
+
+def parse_files(items, ex=None, batch=PARSE_BATCH, ahead=None):
+    """
+    items: (video_id, path, src) tuples. Yields (video_id, segments) in input order.
+    With ex (a pool()), files are parsed batch-wise in the worker processes, with a bounded
+    number of batches in flight (ahead, default 2 per CPU) so results never pile up ahead of
+    the consumer.
+    """
+    if ex is None:
+        for vid, path, src in items:
+            with PROF.stage("parse"):
+                segs = parse_caption_file(path, src)
+            for s in segs:
+                s["video_id"] = vid
+            yield vid, segs
+        return
+    items = list(items)
+    batches = (items[i:i + batch] for i in range(0, len(items), batch))
+    inflight, ahead = deque(), ahead or 2 * (os.cpu_count() or 1)
+    for chunk in batches:
+        inflight.append((chunk, ex.submit(_parse_batch, chunk)))
+        if len(inflight) >= ahead:
+            yield from _drain(*inflight.popleft())
+    while inflight:
+        yield from _drain(*inflight.popleft())
+
+def _drain(chunk, fut):
+    with PROF.stage("parse.wait"):
+        results = fut.result()
+    for (vid, _, _), packed in zip(chunk, results):
+        yield vid, unpack(packed, vid)
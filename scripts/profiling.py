@@ -0,0 +1,131 @@
+# scripts/profiling.py
+# Opt-in build instrumentation shared by the builders.
+#
+#   PROFILE=1            per-stage wall time, worker-pool utilization, peak RSS and (from
+#                        http_client.STATS) per-endpoint latency histograms, written as JSON to
+#                        PROFILE_PATH (default: index.profile.json next to the index, or the
+#                        report_path given by a step that writes no index) + a summary
+#   CPROFILE=build.prof  also run main() under cProfile and dump the stats there (main thread
+#                        only: work done in pool threads shows up as time waiting on futures)
+#
+# Usage in a builder:
+#   with PROF.stage("snippets"): ...                  # any thread; nested stages both count
+#   @PROF.timed("dedupe")                             # same, for a whole function
+#   with PROF.pool("threads", WORKERS, "video"): ...  # utilization = busy("video") / (WORKERS * wall)
+#   PROF.write_report(out_path, http=http_client.STATS.report())
+#   if __name__ == "__main__": run(main)
+
+import os, sys, time, functools, threading
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE      = os.getenv("PROFILE", "0") == "1"
+PROFILE_PATH = os.getenv("PROFILE_PATH", "")
+CPROFILE     = os.getenv("CPROFILE", "")
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)  # bytes on macOS, KiB on Linux
+
+class Profiler:
+    def __init__(self, enabled=PROFILE):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.t0 = time.perf_counter()
+        self.stages = {}   # name -> {"count", "total_s", "max_s"}
+        self.pools = {}    # name -> {"workers", "wall_s", "stage"}
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def timed(self, name):
+        """Decorator form of stage()."""
+        def wrap(fn):
+            @functools.wraps(fn)
+            def inner(*a, **kw):
+                with self.stage(name):
+                    return fn(*a, **kw)
+            return inner
+        return wrap
+
+    def add(self, name, seconds):
+        with self.lock:
+            s = self.stages.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+            s["count"] += 1
+            s["total_s"] += seconds
+            s["max_s"] = max(s["max_s"], seconds)
+
+    @contextmanager
+    def pool(self, name, workers, stage):
+        """Wall time of a worker pool whose workers spend their busy time in stage."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                with self.lock:
+                    self.pools[name] = {"workers": workers, "wall_s": time.perf_counter() - t0, "stage": stage}
+
+    def report(self, **extra):
+        with self.lock:
+            stages = {k: {**v, "avg_ms": round(v["total_s"] / v["count"] * 1000, 3)} for k, v in self.stages.items()}
+            pools = {}
+            for name, p in self.pools.items():
+                busy = self.stages.get(p["stage"], {}).get("total_s", 0.0)
+                capacity = p["workers"] * p["wall_s"]
+                pools[name] = {**p, "busy_s": busy, "utilization": round(busy / capacity, 3) if capacity else None}
+        return {"generated_at": int(time.time()), "script": os.path.basename(sys.argv[0]),
+                "wall_s": time.perf_counter() - self.t0, "peak_rss_mb": peak_rss_mb(),
+                "stages": stages, "pools": pools, **extra}
+
+    def summary(self, report):
+        lines = [f"PROFILE: wall {report['wall_s']:.2f}s  peak RSS {report['peak_rss_mb']} MiB"]
+        for name, s in sorted(report["stages"].items(), key=lambda kv: -kv[1]["total_s"]):
+            lines.append(f"  {name:<22} n:{s['count']:<6} total:{s['total_s']:8.2f}s  avg:{s['avg_ms']:9.2f}ms  max:{s['max_s']*1000:9.1f}ms")
+        for name, p in report["pools"].items():
+            lines.append(f"  pool {name:<17} workers:{p['workers']:<3} wall:{p['wall_s']:7.2f}s  utilization:{p['utilization']}")
+        return "\n".join(lines)
+
+    def write_report(self, index_path=None, report_path=None, **extra):
+        """
+        Write the JSON report (PROFILE_PATH, else report_path, else <index dir>/index.profile.json)
+        and print a summary. Steps that write no index pass report_path.
+        """
+        if not self.enabled:
+            return None
+        path = PROFILE_PATH or report_path or os.path.join(os.path.dirname(index_path) or ".", "index.profile.json")
+        report = self.report(**extra)
+        from index_io import write_json_atomic  # index_io itself reports to PROF
+        write_json_atomic(path, report)
+        print(self.summary(report))
+        print(f"📊 profile report: {path}")
+        return path
+
+PROF = Profiler()
+
+def run(main):
+    """Call main(), under cProfile when CPROFILE is set."""
+    if not CPROFILE:
+        return main()
+    import cProfile, pstats
+    prof = cProfile.Profile()
+    try:
+        return prof.runcall(main)
+    finally:
+        prof.dump_stats(CPROFILE)
+        pstats.Stats(prof).sort_stats("cumulative").print_stats(25)
+        print(f"📊 cProfile stats: {CPROFILE}")
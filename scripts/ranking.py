@@ -0,0 +1,195 @@
+# scripts/ranking.py
+# Relevance ranking of segments over an InvertedIndex (with the lengths/runs statistics written
+# at build time), touching only the postings of the query terms:
+#
+#   BM25        per query term: idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len / avg len))
+#   windows     a segment is also scored together with the next SEARCH_WINDOW - 1 segments of its
+#               run (same video and src) when they add query terms, so a phrase split across two
+#               caption lines still scores as one match (offsets are carried across the boundary)
+#   proximity   x (1 + PROXIMITY_W * (terms - 1) / (span - 1)) for the tightest span holding all
+#               matched terms, + PHRASE_W when the query appears in order
+#   source      x (1 + SOURCE_W * SOURCE_RANK[src]), with SOURCE_RANK taken from the index config
+#
+# Candidates come from the query's rarest terms: a term in more than SEARCH_COMMON_DF of the
+# segments (the, and, to, the channel's name) only adds to segments a rarer query term matched
+# and to windows over them, looked up by seg_id instead of turning every posting into a candidate.
+# When every term is that common, the rarest one alone picks the candidates. Past
+# SEARCH_MAX_SCORED candidates, all get plain BM25 and only the best that many get the windows
+# and proximity pass (which only ever raise a score).
+#
+# A trailing '*' on the last query token expands to every term with that prefix. A token that is
+# not in the vocabulary expands to its closest terms within 1 (3-5 letters) or 2 edits (6+ letters)
+# (see term_dict.py), weighted down by FUZZY_W.
+
+import os, math, heapq, bisect
+from operator import itemgetter
+from array import array
+from term_dict import TermDictionary
+
+BM25_K1     = float(os.getenv("BM25_K1", "1.2"))
+BM25_B      = float(os.getenv("BM25_B", "0.75"))
+WINDOW      = int(os.getenv("SEARCH_WINDOW", "2"))
+COMMON_DF   = float(os.getenv("SEARCH_COMMON_DF", "0.05"))
+MAX_SCORED  = int(os.getenv("SEARCH_MAX_SCORED", "200"))
+PROXIMITY_W = 0.5
+PHRASE_W    = 0.5
+SOURCE_W    = 0.1
+FUZZY_W     = 0.5
+
+def fuzzy_edits(tok):
+    """Edits allowed for a token that has no exact match: none for 1-2 letters, 1 up to 5, then 2."""
+    return 0 if len(tok) <= 2 else 1 if len(tok) <= 5 else 2
+
+class Ranker:
+    def __init__(self, index, segments, source_rank=None):
+        """index: InvertedIndex with lengths and runs; segments: index.json's "segments" (for src)."""
+        self.index = index
+        self.dictionary = TermDictionary(index.vocab)
+        self.lengths = index.lengths
+        self.avgdl = (sum(self.lengths) / len(self.lengths)) if self.lengths else 1.0
+        self.run_starts = index.runs
+        # per-segment constants, computed once per loaded index: BM25 length norm, source boost
+        self.len_norm = array("d", (BM25_K1 * (1 - BM25_B + BM25_B * n / self.avgdl) for n in self.lengths))
+        source_rank = source_rank or {}
+        self.boost = array("d", (1 + SOURCE_W * source_rank.get(s.get("src"), 0) for s in segments))
+
+    def same_run(self, a, b):
+        """True if segments a < b belong to the same run."""
+        i = bisect.bisect_right(self.run_starts, a)
+        return b < (self.run_starts[i] if i < len(self.run_starts) else self.index.n_segments)
+
+    def expand(self, tok):
+        """(terms, weight) a query token stands for: itself, its prefix matches for 'tok*', or near spellings."""
+        if tok.endswith("*"):
+            return self.dictionary.prefix(tok[:-1]), 1.0
+        if tok in self.index.terms or not fuzzy_edits(tok):
+            return [tok], 1.0
+        return [t for t, _ in self.dictionary.fuzzy(tok, fuzzy_edits(tok), closest=True)], FUZZY_W
+
+    def _postings(self, tok):
+        """(postings [seg_id, pos, ...] by seg_id, weight) for a query token; expanded terms are merged per segment."""
+        terms, weight = self.expand(tok)
+        if len(terms) == 1:
+            return self.index.terms.get(terms[0], ()), weight
+        out = {}
+        for t in terms:
+            for p in self.index.terms[t]:
+                out.setdefault(p[0], [p[0]]).extend(p[1:])
+        return sorted(out.values(), key=_seg), weight
+
+    def rank(self, toks):
+        """toks: normalized query tokens. Returns {seg_id: score} for every segment (window start) that matched."""
+        uniq = list(dict.fromkeys(toks))
+        order = [uniq.index(t) for t in toks]
+        n = self.index.n_segments or 1
+        lists, idf = [], []
+        for tok in uniq:
+            postings, weight = self._postings(tok)
+            df = len(postings)
+            lists.append(postings)
+            idf.append(weight * math.log(1 + (n - df + 0.5) / (df + 0.5)))
+        by_df = sorted((ti for ti in range(len(uniq)) if lists[ti]), key=lambda ti: len(lists[ti]))
+        rare = [ti for ti in by_df if len(lists[ti]) <= COMMON_DF * n] or by_df[:1]
+
+        hits = {}  # seg_id -> {term index: posting}
+        for ti in rare:
+            for p in lists[ti]:
+                h = hits.get(p[0])
+                if h is None:
+                    hits[p[0]] = {ti: p}
+                else:
+                    h[ti] = p
+        starts = set(hits)  # the candidates; common terms only add to them and their windows
+        ahead = range(1, WINDOW)
+        if len(rare) < len(by_df):
+            lookup = sorted({seg_id + k for seg_id in starts for k in range(1 - WINDOW, WINDOW)})
+            for ti in by_df[len(rare):]:
+                postings = lists[ti]
+                if len(lookup) * 16 > len(postings):  # many candidates: one pass over the postings
+                    at = {p[0]: p for p in postings}
+                    for seg_id in lookup:
+                        p = at.get(seg_id)
+                        if p is not None:
+                            hits.setdefault(seg_id, {})[ti] = p
+                    continue
+                j = 0
+                for seg_id in lookup:
+                    j = bisect.bisect_left(postings, seg_id, j, key=_seg)
+                    if j == len(postings):
+                        break
+                    if postings[j][0] == seg_id:
+                        hits.setdefault(seg_id, {})[ti] = postings[j]
+            # a segment with only common terms right before a candidate starts a window into it
+            starts |= {seg_id - k for seg_id in starts for k in ahead
+                       if seg_id - k in hits and self.same_run(seg_id - k, seg_id)}
+
+        scores, len_norm, boost, k1 = {}, self.len_norm, self.boost, BM25_K1
+        if len(starts) > MAX_SCORED:
+            for seg_id in starts:
+                norm = len_norm[seg_id]
+                scores[seg_id] = boost[seg_id] * sum(idf[ti] * (len(p) - 1) * (k1 + 1) / (len(p) - 1 + norm)
+                                                     for ti, p in hits[seg_id].items())
+            starts = heapq.nlargest(MAX_SCORED, starts, key=scores.__getitem__)
+        for seg_id in starts:
+            h = hits[seg_id]
+            if len(h) == 1:  # most segments match one term: plain BM25, no proximity
+                for ti, p in h.items():
+                    tf = len(p) - 1
+                    best = idf[ti] * tf * (k1 + 1) / (tf + len_norm[seg_id])
+            else:
+                best = self._score(seg_id, [h], idf, order)
+            for k in ahead:
+                if seg_id + k in hits:
+                    best = max(best, self._window(seg_id, h, hits, idf, order))
+                    break
+            scores[seg_id] = best * boost[seg_id]
+        return scores
+
+    def _window(self, seg_id, h, hits, idf, order):
+        """Best score of seg_id joined with following segments of its run that add query terms."""
+        best, parts, covered = 0.0, [h], set(h)
+        for nxt in range(seg_id + 1, seg_id + WINDOW):
+            if nxt >= len(self.lengths) or not self.same_run(seg_id, nxt):
+                break
+            nh = hits.get(nxt, {})
+            parts.append(nh)
+            if not nh.keys() <= covered:  # only windows that bring in another query term
+                covered |= nh.keys()
+                best = max(best, self._score(seg_id, parts, idf, order))
+        return best
+
+    def _score(self, seg_id, parts, idf, order):
+        """BM25 x proximity of the window of len(parts) segments from seg_id; parts: term index -> posting."""
+        tf, positions, offset = {}, [], 0
+        for i, h in enumerate(parts):
+            for ti, p in h.items():
+                tf[ti] = tf.get(ti, 0) + len(p) - 1
+                positions += [(offset + pos, ti) for pos in p[1:]]
+            offset += self.lengths[seg_id + i]
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * offset / self.avgdl)
+        score = sum(idf[ti] * f * (BM25_K1 + 1) / (f + norm) for ti, f in tf.items())
+        if len(tf) > 1:
+            positions.sort()
+            phrase = len(tf) == len(idf) and _in_order(positions, order)
+            # a phrase of distinct terms is already the tightest span
+            span = len(tf) if phrase and len(order) == len(tf) else _min_span(positions, len(tf))
+            score *= 1 + PROXIMITY_W * (len(tf) - 1) / max(span - 1, 1)
+            if phrase:
+                score *= 1 + PHRASE_W
+        return score
+
+_seg = itemgetter(0)
+
+def _min_span(positions, k):
+    """Smallest (last - first + 1) over windows of the sorted (pos, term) list holding k distinct terms."""
+    last, best = {}, float("inf")  # the tightest window ending at p starts at the oldest last occurrence
+    for p, ti in positions:
+        last[ti] = p
+        if len(last) == k:
+            best = min(best, p - min(last.values()) + 1)
+    return best
+
+def _in_order(positions, order):
+    """True if the query's terms (order = term index per query token) occur consecutively."""
+    at, first, rest = set(positions), order[0], list(enumerate(order))[1:]
+    return any(all((p + k, ti) in at for k, ti in rest) for p, ti in positions if ti == first)
@@ -0,0 +1,248 @@
+# scripts/search_server.py
+# Local HTTP search over public/index.json (+ inverted.json when it matches the same build).
+#
+#   GET /search?q=fader+page&limit=10   hits ranked by ranking.py (BM25, windows, proximity, source),
+#                                       grouped by video, with ?t= deep links
+#        &mode=hybrid                   also vector hits from vectors.npy (see semantic.py), merged by
+#                                       reciprocal rank fusion; mode=semantic for vector hits only
+#                                       (keyword results, and "mode": "keyword", when the build has
+#                                       no vectors or they are not from the same build)
+#   GET /stats                          index + cache counters
+#
+# The index is reloaded when index.json changes on disk (checked every SEARCH_RELOAD_S seconds);
+# requests keep using the previous snapshot until the new one is fully loaded.
+# Results are cached per normalized query in an LRU that is dropped whenever generated_at changes.
+#
+#   INDEX_PATH=public/index.json SEARCH_PORT=8080 python scripts/search_server.py
+
+import os, sys, json, threading
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from inverted_index import InvertedIndex, tokenize
+from ranking import Ranker
+from semantic import VectorIndex
+
+INDEX_PATH = os.getenv("INDEX_PATH", "public/index.json")
+PORT       = int(os.getenv("SEARCH_PORT", "8080"))
+RELOAD_S   = float(os.getenv("SEARCH_RELOAD_S", "2"))
+CACHE_SIZE = int(os.getenv("SEARCH_CACHE", "1024"))   # 0 disables the result cache
+MAX_LIMIT  = 100
+HITS_PER_VIDEO = 5
+MODES      = ("keyword", "hybrid", "semantic")
+SEMANTIC_K = 100   # vector hits considered per query
+RRF_K      = 60
+
+def normalize_query(q):
+    """Cache key / parse form: lowercased tokens, a trailing '*' kept on the last one."""
+    toks = tokenize(q)
+    if toks and q.strip().endswith("*"):
+        toks[-1] += "*"
+    return " ".join(toks)
+
+class Snapshot:
+    """One loaded build: segments, videos, the inverted index over them and its ranker (+ vectors if built)."""
+    def __init__(self, path):
+        self.path, self.mtime = path, os.stat(path).st_mtime_ns
+        with open(path, "r", encoding="utf-8") as f:
+            j = json.load(f)
+        self.generated_at = j.get("generated_at")
+        self.segments = j.get("segments", [])
+        self.videos = {v["id"]: v for v in j.get("videos", [])}
+        inv_path = os.path.join(os.path.dirname(path), "inverted.json")
+        idx = None
+        if os.path.exists(inv_path):
+            idx = InvertedIndex.load(inv_path)
+            if idx.generated_at != self.generated_at or idx.n_segments != len(self.segments) or idx.lengths is None:
+                idx = None  # left over from another build, or written before ranking statistics
+        self.index = idx or InvertedIndex.from_segments(self.segments, self.generated_at)
+        self.ranker = Ranker(self.index, self.segments, j.get("config", {}).get("source_rank"))
+        self.vectors = VectorIndex.load(os.path.dirname(path), self.generated_at, len(self.segments))
+
+    def search(self, nq, limit=10, mode="keyword"):
+        toks = nq.split()
+        if not toks:
+            return []
+        scores = self.ranker.rank(toks) if mode != "semantic" else {}
+        span = {}  # seg_id -> segments shown for it (a vector hit's whole window)
+        if mode != "keyword" and self.vectors:
+            hits = self.vectors.search(nq.replace("*", ""), SEMANTIC_K)
+            if mode == "semantic":
+                scores = {seg_id: sim for seg_id, _, sim in hits}
+                span = {seg_id: n for seg_id, n, _ in hits}
+            else:
+                scores, span = fuse(scores, hits)
+
+        by_video = {}
+        for seg_id, score in scores.items():
+            by_video.setdefault(self.segments[seg_id]["video_id"], []).append((score, seg_id))
+        groups = []
+        for vid, hits in by_video.items():
+            hits.sort(key=lambda h: (-h[0], self.segments[h[1]]["start"]))
+            v = self.videos.get(vid, {})
+            groups.append({
+                "video_id": vid,
+                "title": v.get("title", ""),
+                "url": v.get("url") or f"https://youtu.be/{vid}",
+                # more matching segments lift a video a little; fused and cosine scores are on
+                # another scale than BM25, so there the best hit alone ranks the video
+                "score": round(hits[0][0] + (0.1 * (len(hits) - 1) ** 0.5 if mode == "keyword" else 0), 4),
+                "matches": len(hits),
+                "hits": [self._hit(seg_id, score, span.get(seg_id, 1)) for score, seg_id in hits[:HITS_PER_VIDEO]],
+            })
+        groups.sort(key=lambda g: (-g["score"], g["video_id"]))
+        return groups[:limit]
+
+    def _hit(self, seg_id, score, n=1):
+        s = self.segments[seg_id]
+        start = int(s["start"])
+        text = " ".join(x["text"] for x in self.segments[seg_id:seg_id + n])
+        return {"start": s["start"], "text": text, "src": s.get("src"), "score": round(score, 4),
+                "url": f"https://youtu.be/{s['video_id']}?t={start}"}
+
+def fuse(scores, hits):
+    """
+    Reciprocal rank fusion of keyword scores {seg_id: score} and vector hits [(seg_id, n, sim), ...]
+    (windows of n segments from seg_id), per segment: a window's rank goes to every keyword hit it
+    covers (each segment counts its best window once), or to its first segment if it covers none.
+    Returns ({seg_id: score}, {seg_id: window length} for the window-only hits).
+    """
+    out, best, span = {}, {}, {}
+    for rank, seg_id in enumerate(sorted(scores, key=lambda i: -scores[i])):
+        out[seg_id] = 1.0 / (RRF_K + rank + 1)
+    for rank, (start, n, _) in enumerate(hits):  # best window first
+        for seg_id in [i for i in range(start, start + n) if i in scores] or [start]:
+            best.setdefault(seg_id, rank)
+            if seg_id not in scores:
+                span.setdefault(seg_id, n)
+    for seg_id, rank in best.items():
+        out[seg_id] = out.get(seg_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+    return out, span
+
+class LRUCache:
+    def __init__(self, size):
+        self.size, self.data, self.lock = size, OrderedDict(), threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key in self.data:
+                self.data.move_to_end(key)
+                self.hits += 1
+                return self.data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.size <= 0:
+            return
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.size:
+                self.data.popitem(last=False)
+
+class SearchService:
+    def __init__(self, path=INDEX_PATH, cache_size=CACHE_SIZE, reload_s=RELOAD_S):
+        self.path, self.reload_s = path, reload_s
+        self.snap = Snapshot(path)
+        self.cache = LRUCache(cache_size)
+        self.cache_gen = self.snap.generated_at
+        self.reloads = 0
+        self._stop = threading.Event()
+
+    def query(self, q, limit=10, mode="keyword"):
+        snap = self.snap  # one consistent build for the whole request
+        nq = normalize_query(q)
+        if not snap.vectors:
+            mode = "keyword"
+        key = (snap.generated_at, nq, limit, mode)
+        res = self.cache.get(key)
+        if res is None:
+            res = {"query": nq, "mode": mode, "generated_at": snap.generated_at, "results": snap.search(nq, limit, mode)}
+            self.cache.put(key, res)
+        return res
+
+    def maybe_reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self.snap.mtime:
+            return False
+        try:
+            snap = Snapshot(self.path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ reload failed, keeping previous index: {e}", file=sys.stderr)
+            return False
+        self.snap = snap
+        self.reloads += 1
+        if snap.generated_at != self.cache_gen:
+            self.cache = LRUCache(self.cache.size)
+            self.cache_gen = snap.generated_at
+        print(f"🔄 reloaded {self.path}: {len(snap.segments)} segments, generated_at={snap.generated_at}")
+        return True
+
+    def watch(self):
+        def loop():
+            while not self._stop.wait(self.reload_s):
+                self.maybe_reload()
+        threading.Thread(target=loop, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        snap, c = self.snap, self.cache
+        return {"generated_at": snap.generated_at, "segments": len(snap.segments), "videos": len(snap.videos),
+                "terms": len(snap.index.vocab), "vectors": len(snap.vectors.vecs) if snap.vectors else 0,
+                "reloads": self.reloads,
+                "cache": {"size": len(c.data), "max": c.size, "hits": c.hits, "misses": c.misses}}
+
+def make_server(service, port=PORT, host="127.0.0.1"):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+        def log_message(self, *a): pass
+
+        def send_json(self, status, obj):
+            data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            u = urlsplit(self.path)
+            q = {k: v[0] for k, v in parse_qs(u.query).items()}
+            if u.path == "/search":
+                try:
+                    limit = max(1, min(MAX_LIMIT, int(q.get("limit") or 10)))
+                except ValueError:
+                    return self.send_json(400, {"error": "limit must be an integer"})
+                mode = q.get("mode") or "keyword"
+                if mode not in MODES:
+                    return self.send_json(400, {"error": f"mode must be one of {', '.join(MODES)}"})
+                return self.send_json(200, service.query(q.get("q", ""), limit, mode))
+            if u.path == "/stats":
+                return self.send_json(200, service.stats())
+            self.send_json(404, {"error": "not found"})
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+def main():
+    service = SearchService()
+    service.watch()
+    server = make_server(service)
+    print(f"🔎 {len(service.snap.segments)} segments from {INDEX_PATH} on http://127.0.0.1:{server.server_port}/search?q=", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+# scripts/segment_store.py
+# Compact columnar encoding of index.json's "segments" (written as public/segments.bin with COMPACT=1).
+#
+#   magic   b"BOSEG\x00\x01\x00"                       8 bytes
+#   u32     header length, then header JSON:           {"generated_at", "count", "videos": [...], "srcs": [...]}
+#   u32[n]  video index per segment (into header.videos)
+#   u32[n]  start in milliseconds
+#   u8[n]   src index (into header.srcs), padded to 4 bytes
+#   u32[n+1] offsets into the text blob
+#   bytes   all segment texts, utf-8, concatenated
+#
+# All integers little-endian. video_id/src strings are stored once; norm is not stored at all
+# (it is text.lower(), derived on access). SegmentStore memory-maps the file and decodes rows lazily.
+
+import os, sys, json, mmap, struct, shutil, tempfile
+from array import array
+
+MAGIC = b"BOSEG\x00\x01\x00"
+
+def _le(a):
+    if sys.byteorder != "little":
+        a.byteswap()
+    return a
+
+def _u32(buf):
+    """Copy of little-endian u32 data from a buffer (array("I", memoryview) would read it byte by byte)."""
+    a = array("I")
+    a.frombytes(buf)
+    return _le(a)
+
+def _pad4(n):
+    return b"\x00" * (-n % 4)
+
+class SegmentStoreWriter:
+    """Appends segments as they are produced; the text blob is spooled to a temp file, columns stay as arrays."""
+    def __init__(self):
+        self.videos, self.srcs = {}, {}
+        self.vid_idx, self.starts, self.src_idx, self.offsets = array("I"), array("I"), array("B"), array("I", [0])
+        self.blob, self.blob_len = tempfile.TemporaryFile(), 0
+
+    def add(self, segs):
+        for s in segs:
+            data = s["text"].encode("utf-8")
+            self.vid_idx.append(self.videos.setdefault(s["video_id"], len(self.videos)))
+            self.starts.append(int(round(s["start"] * 1000)))
+            self.src_idx.append(self.srcs.setdefault(s.get("src", ""), len(self.srcs)))
+            self.blob.write(data)
+            self.blob_len += len(data)
+            self.offsets.append(self.blob_len)
+
+    def write(self, f, generated_at=None):
+        """Write the finished store to the binary file f."""
+        header = json.dumps({
+            "generated_at": generated_at,
+            "count": len(self.vid_idx),
+            "videos": list(self.videos),
+            "srcs": list(self.srcs),
+        }, ensure_ascii=False).encode("utf-8")
+        header += _pad4(len(MAGIC) + 4 + len(header))
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        f.write(_le(array("I", self.vid_idx)).tobytes())
+        f.write(_le(array("I", self.starts)).tobytes())
+        f.write(self.src_idx.tobytes() + _pad4(len(self.src_idx)))
+        f.write(_le(array("I", self.offsets)).tobytes())
+        self.blob.seek(0)
+        shutil.copyfileobj(self.blob, f)
+
+    def close(self):
+        self.blob.close()
+
+def write_segment_store(out, path):
+    w = SegmentStoreWriter()
+    w.add(out["segments"])
+    d = os.path.dirname(path) or "."
+    os.makedirs(d, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=d, prefix=".tmp-", suffix=".bin")
+    os.chmod(tmp, 0o644)
+    with os.fdopen(fd, "wb") as f:
+        w.write(f, out.get("generated_at"))
+    w.close()
+    os.replace(tmp, path)
+
+class SegmentStore:
+    """Read-only, memory-mapped view of a segments.bin file. Rows are dicts shaped like index.json segments."""
+    def __init__(self, path):
+        self._f = open(path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}: not a segment store")
+        (hlen,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        pos = len(MAGIC) + 4
+        self.header = json.loads(bytes(self._mm[pos:pos + hlen]).rstrip(b"\x00"))
+        self.videos, self.srcs, n = self.header["videos"], self.header["srcs"], self.header["count"]
+        self.generated_at = self.header.get("generated_at")
+        pos += hlen
+        mv = self._mv = memoryview(self._mm)
+        if sys.byteorder != "little":  # rare: copy + swap instead of zero-copy views
+            cols = [_u32(mv[pos + i * 4 * n:pos + (i + 1) * 4 * n]) for i in range(2)]
+            self._vid, self._start = cols
+        else:
+            self._vid = mv[pos:pos + 4 * n].cast("I")
+            self._start = mv[pos + 4 * n:pos + 8 * n].cast("I")
+        pos += 8 * n
+        self._src = mv[pos:pos + n]
+        pos += n + (-n % 4)
+        if sys.byteorder != "little":
+            self._off = _u32(mv[pos:pos + 4 * (n + 1)])
+        else:
+            self._off = mv[pos:pos + 4 * (n + 1)].cast("I")
+        self._text_base = pos + 4 * (n + 1)
+        self._n = n
+
+    def __len__(self):
+        return self._n
+
+    def text(self, i):
+        a, b = self._off[i], self._off[i + 1]
+        return self._mm[self._text_base + a:self._text_base + b].decode("utf-8")
+
+    def start(self, i):
+        ms = self._start[i]
+        return ms // 1000 if ms % 1000 == 0 else ms / 1000
+
+    def video_id(self, i):
+        return self.videos[self._vid[i]]
+
+    def __getitem__(self, i):
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        text, src = self.text(i), self.srcs[self._src[i]]
+        row = {"video_id": self.video_id(i), "start": self.start(i), "text": text, "norm": text.lower()}
+        if src:
+            row["src"] = src
+        return row
+
+    def __iter__(self):
+        return (self[i] for i in range(self._n))
+
+    def close(self):
+        for attr in ("_vid", "_start", "_src", "_off", "_mv"):
+            v = getattr(self, attr)
+            if isinstance(v, memoryview): v.release()
+        self._mm.close(); self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,219 @@
+# scripts/semantic.py
+# Optional vector search over caption windows (EMBED=1 at build time; needs numpy):
+#
+#   vectors.npy    float16 [windows, EMBED_DIM], L2-normalized, rows grouped by video in video id order
+#   vectors.json   {"generated_at", "config", "videos": {id: {"digest", "row", "seg_start", "windows"}}}
+#
+# A window is EMBED_WINDOW consecutive segments of one run (same video and src), every
+# EMBED_STRIDE segments, so a sentence split across caption lines lands in one vector. Windows are
+# embedded with a hashing vectorizer (no model, no vocabulary): each non-stopword token adds its
+# own feature and, at lower weight, its character trigrams ("fade" and "fader" share most of them),
+# hashed into EMBED_DIM signed buckets. Vectors of a video whose segments are unchanged since the
+# previous build are copied from the previous vectors.npy; only new or changed videos are embedded,
+# EMBED_BATCH windows at a time.
+#
+# VectorIndex answers queries by cosine similarity: an exact scan up to ANN_MIN windows, above
+# that random-hyperplane LSH (ANN_TABLES tables of ANN_BITS bits, probing each bucket and its
+# one-bit neighbours) to shortlist windows for the exact scan.
+
+import os, json, zlib, hashlib
+from inverted_index import tokenize
+
+try:
+    import numpy as np
+except ImportError:  # semantic search is simply unavailable
+    np = None
+
+EMBED_DIM    = int(os.getenv("EMBED_DIM", "256"))
+EMBED_WINDOW = int(os.getenv("EMBED_WINDOW", "3"))
+EMBED_STRIDE = int(os.getenv("EMBED_STRIDE", "2"))
+EMBED_BATCH  = int(os.getenv("EMBED_BATCH", "512"))
+ANN_MIN      = int(os.getenv("ANN_MIN", "50000"))
+ANN_TABLES   = 8
+ANN_BITS     = 10
+GRAM_W       = 0.35  # weight of each character trigram relative to the whole token
+STOPWORDS = frozenset("""a an and are as at be but by can do does for from get go going got have how i i'll i'm
+if in is it it's just let's like me my now of on or our over so that that's the then there this to up
+we what when where which with you your""".split())
+
+def config():
+    return {"dim": EMBED_DIM, "window": EMBED_WINDOW, "stride": EMBED_STRIDE, "features": "tok+tri/v1"}
+
+class HashingEmbedder:
+    def __init__(self, dim=EMBED_DIM):
+        self.dim = dim
+        self._features = {}  # token -> [(bucket, signed weight), ...]
+
+    def features(self, tok):
+        f = self._features.get(tok)
+        if f is None:
+            w = f"<{tok}>"
+            f = []
+            for feat, weight in [(tok, 1.0)] + [(w[i:i + 3], GRAM_W) for i in range(len(w) - 2)]:
+                h = zlib.crc32(feat.encode("utf-8"))
+                f.append((h % self.dim, weight if h & 0x10000 else -weight))
+            self._features[tok] = f
+        return f
+
+    def embed(self, texts):
+        """float16 [len(texts), dim], rows L2-normalized (all-zero for texts with no content words)."""
+        rows, cols, vals = [], [], []
+        for r, text in enumerate(texts):
+            for tok in tokenize(text):
+                if tok in STOPWORDS:
+                    continue
+                for c, v in self.features(tok):
+                    rows.append(r); cols.append(c); vals.append(v)
+        m = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(m, (rows, cols), vals)
+        norms = np.linalg.norm(m, axis=1, keepdims=True)
+        return (m / np.maximum(norms, 1e-9)).astype(np.float16)
+
+def windows(segs):
+    """[(first, count), ...] over segs (one video): EMBED_WINDOW-segment windows within each src run."""
+    out, i = [], 0
+    while i < len(segs):
+        j = i
+        while j < len(segs) and segs[j].get("src") == segs[i].get("src"):
+            j += 1
+        for k in range(i, j, EMBED_STRIDE):
+            out.append((k, min(EMBED_WINDOW, j - k)))
+            if k + EMBED_WINDOW >= j:
+                break
+        i = j
+    return out
+
+def _digest(segs):
+    h = hashlib.sha1(json.dumps(config()).encode("utf-8"))
+    for s in segs:
+        h.update(f"{s.get('src')}\x00{s['text']}\x01".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+def _read_previous(out_dir):
+    try:
+        with open(os.path.join(out_dir, "vectors.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("config") != config():
+            return {}, None
+        return meta["videos"], np.load(os.path.join(out_dir, "vectors.npy"), mmap_mode="r")
+    except (OSError, ValueError, KeyError):
+        return {}, None
+
+# ---------- write ----------
+class VectorWriter:
+    """Fed by index_io.IndexWriter; unchanged videos reuse last build's rows, the rest are embedded in batches."""
+    def __init__(self, out_dir):
+        self.dir = out_dir
+        self.embedder = HashingEmbedder()
+        self.prev_videos, self.prev = _read_previous(out_dir)
+        self.videos, self.blocks, self.rows = {}, [], 0
+        self.pending_texts = []
+        self.reused = self.embedded = 0
+
+    def add_video(self, video, segs, seg_start):
+        wins = windows(segs)
+        digest, old = _digest(segs), self.prev_videos.get(video["id"])
+        self.videos[video["id"]] = {"digest": digest, "row": self.rows, "seg_start": seg_start, "windows": wins}
+        self.rows += len(wins)
+        if old and old["digest"] == digest and self.prev is not None:
+            self._flush()
+            self.blocks.append(np.array(self.prev[old["row"]:old["row"] + len(wins)]))
+            self.reused += len(wins)
+            return
+        self.pending_texts.extend(" ".join(s["text"] for s in segs[a:a + n]) for a, n in wins)
+        if len(self.pending_texts) >= EMBED_BATCH:
+            self._flush()
+
+    def _flush(self):
+        for i in range(0, len(self.pending_texts), EMBED_BATCH):
+            self.blocks.append(self.embedder.embed(self.pending_texts[i:i + EMBED_BATCH]))
+        self.embedded += len(self.pending_texts)
+        self.pending_texts = []
+
+    def finish(self):
+        """Embed what is pending and put the rows in their final order; then write_npy / write_meta."""
+        self._flush()
+        vecs = np.concatenate(self.blocks) if self.blocks else np.zeros((0, EMBED_DIM), dtype=np.float16)
+        # rows in video id order, not arrival order (builders finish videos in any order), so a
+        # build where no video changed writes a byte-identical vectors.npy
+        order, row = [], 0
+        for vid in sorted(self.videos):
+            v = self.videos[vid]
+            order.append(np.arange(v["row"], v["row"] + len(v["windows"])))
+            v["row"] = row
+            row += len(v["windows"])
+        self.vecs = vecs[np.concatenate(order)] if order else vecs
+        self.videos = {vid: self.videos[vid] for vid in sorted(self.videos)}
+        self.blocks, self.prev = [], None  # drop the memory map before vectors.npy is replaced
+        print(f"🔎 vectors: {len(self.vecs)} windows ({self.embedded} embedded, {self.reused} reused)")
+
+    def write_npy(self, f, generated_at):
+        np.save(f, self.vecs)
+
+    def write_meta(self, f, generated_at):
+        f.write(json.dumps({"generated_at": generated_at, "config": config(), "videos": self.videos},
+                           ensure_ascii=False, separators=(",", ":")))
+
+# ---------- read ----------
+class VectorIndex:
+    def __init__(self, vecs, videos):
+        self.vecs = vecs.astype(np.float32)  # float16 on disk; float32 matmuls are several times faster
+        self.embedder = HashingEmbedder(vecs.shape[1])
+        starts, counts = [], []  # global seg id of each window's first segment and its length, in row order
+        for v in sorted(videos.values(), key=lambda v: v["row"]):
+            starts.extend(v["seg_start"] + a for a, _ in v["windows"])
+            counts.extend(n for _, n in v["windows"])
+        self.seg_starts = np.array(starts, dtype=np.int64)
+        self.seg_counts = np.array(counts, dtype=np.int64)
+        self.tables = None
+        if len(vecs) > ANN_MIN:
+            rng = np.random.default_rng(1)
+            self.planes = rng.standard_normal((vecs.shape[1], ANN_TABLES * ANN_BITS)).astype(np.float32)
+            keys = self._keys(self.vecs)
+            self.tables = []
+            for t in range(ANN_TABLES):
+                order = np.argsort(keys[:, t], kind="stable")
+                self.tables.append((keys[order, t], order))
+
+    @classmethod
+    def load(cls, out_dir, generated_at, n_segments):
+        """The index for out_dir's vectors, or None if missing, from another build or numpy is unavailable."""
+        if np is None:
+            return None
+        try:
+            with open(os.path.join(out_dir, "vectors.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("generated_at") != generated_at:
+                return None
+            idx = cls(np.load(os.path.join(out_dir, "vectors.npy")), meta["videos"])
+        except (OSError, ValueError, KeyError):
+            return None
+        return idx if not len(idx.seg_starts) or idx.seg_starts.max() < n_segments else None
+
+    def _keys(self, m):
+        bits = (m @ self.planes > 0).reshape(len(m), ANN_TABLES, ANN_BITS)
+        return (bits * (1 << np.arange(ANN_BITS))).sum(axis=2)
+
+    def candidates(self, q):
+        """Rows sharing an LSH bucket (or a one-bit neighbour of it) with query vector q."""
+        keys = self._keys(q[None, :])[0]
+        out = []
+        for t, (sorted_keys, order) in enumerate(self.tables):
+            probes = [keys[t]] + [keys[t] ^ (1 << b) for b in range(ANN_BITS)]
+            for k in probes:
+                lo, hi = np.searchsorted(sorted_keys, k, "left"), np.searchsorted(sorted_keys, k, "right")
+                out.append(order[lo:hi])
+        return np.unique(np.concatenate(out))
+
+    def search(self, text, k=50):
+        """[(seg_id of the window's first segment, segments in the window, cosine), ...] best first."""
+        q = self.embedder.embed([text])[0].astype(np.float32)
+        if not q.any():
+            return []
+        rows = self.candidates(q) if self.tables else None
+        vecs = self.vecs if rows is None else self.vecs[rows]
+        sims = vecs @ q
+        top = np.argsort(-sims)[:k]
+        top = top[sims[top] > 0]
+        ids = top if rows is None else rows[top]
+        return [(int(self.seg_starts[i]), int(self.seg_counts[i]), float(sims[j])) for i, j in zip(ids, top)]
@@ -0,0 +1,100 @@
+# scripts/term_dict.py
+# Typo-tolerant term lookup over the index vocabulary (inverted.json's terms):
+#
+#   TermDictionary(vocab).prefix("fad")      -> ["fade", "fader", "faders", ...]   (sorted vocab, bisect)
+#   TermDictionary(vocab).fuzzy("fadr", 2)   -> [("fader", 1), ("fade", 1), ...]   (distance, then term)
+#
+# fuzzy() shortlists terms by the trigrams they share with the padded word ("$$fadr$$"): an
+# insert, delete or substitution breaks at most 3 of the word's g distinct trigrams and an adjacent
+# transposition 4, so a term within k edits (at most one of them a transposition) shares at least
+# g - 3k - 1 of them, and a term sharing none is never considered (only possible for very short
+# words). Shortlisted terms of a plausible length are verified with a bit-parallel edit distance
+# (Hyyro's variant of Myers' algorithm) that counts a transposition as one edit ("fdaer" -> "fader").
+
+import bisect
+from array import array
+from collections import Counter
+from itertools import chain
+
+def _grams(word):
+    w = f"$${word}$$"
+    return {w[i:i + 3] for i in range(len(w) - 2)}
+
+def _peq(word):
+    """char -> bitmask of its positions in word."""
+    peq = {}
+    for i, c in enumerate(word):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    return peq
+
+def _distance(peq, m, text):
+    """Edit distance (with adjacent transpositions) between the m-letter word behind peq and text."""
+    if not m:
+        return len(text)
+    full, last = (1 << m) - 1, 1 << (m - 1)
+    vp, vn, d0, pm_prev, score = full, 0, 0, 0, m
+    for c in text:
+        pm = peq.get(c, 0)
+        tr = (((~d0) & pm) << 1) & pm_prev
+        d0 = (((pm & vp) + vp) ^ vp) | pm | vn | tr
+        hp = vn | ~(d0 | vp)
+        hn = d0 & vp
+        if hp & last:
+            score += 1
+        elif hn & last:
+            score -= 1
+        x = (hp << 1) | 1
+        vn = x & d0 & full
+        vp = ((hn << 1) | ~(x | d0)) & full
+        pm_prev = pm
+    return score
+
+def edit_distance(a, b):
+    return _distance(_peq(a), len(a), b)
+
+class TermDictionary:
+    def __init__(self, vocab):
+        """vocab: sorted list of terms."""
+        self.terms = vocab
+        self.grams = {}
+        for tid, t in enumerate(vocab):
+            for g in _grams(t):
+                a = self.grams.get(g)
+                if a is None:
+                    a = self.grams[g] = array("I")
+                a.append(tid)
+
+    def prefix(self, p):
+        i = bisect.bisect_left(self.terms, p)
+        out = []
+        while i < len(self.terms) and self.terms[i].startswith(p):
+            out.append(self.terms[i]); i += 1
+        return out
+
+    def fuzzy(self, word, k=2, closest=False):
+        """
+        Terms within k edits of word, as (term, distance) sorted by distance, then term.
+        closest: only the terms at the smallest distance found. Candidates are visited by shared
+        trigrams, most first, so once a close match is known the rest can be ruled out by count.
+        """
+        grams = _grams(word)
+        g = len(grams)
+        by_count = {}
+        for tid, c in Counter(chain.from_iterable(self.grams.get(x, ()) for x in grams)).items():
+            if c >= g - 3 * k - 1:
+                by_count.setdefault(c, []).append(tid)
+        peq, n, out = _peq(word), len(word), []
+        for c in sorted(by_count, reverse=True):
+            if closest and out and c < g - 3 * k - 1:
+                break
+            for tid in by_count[c]:
+                t = self.terms[tid]
+                if abs(len(t) - n) <= k:
+                    d = _distance(peq, n, t)
+                    if d <= k:
+                        if closest and d < k:
+                            out = [x for x in out if x[1] <= d]
+                            k = d
+                        out.append((t, d))
+        out.sort(key=lambda x: (x[1], x[0]))
+        return out
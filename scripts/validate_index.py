@@ -0,0 +1,262 @@
+# scripts/validate_index.py
+# Integrity gate for index.json. IndexWriter runs the checks on each video and segment as it
+# writes them and renames nothing into place if they fail (VALIDATE=0 skips them); standalone,
+# the file is streamed (one video or segment decoded at a time), so memory stays flat:
+#
+#   python scripts/validate_index.py public/index.json [previous/index.json]
+#
+#
+#   schema       an object with an integer generated_at and "videos" / "segments" arrays; videos
+#                have a unique string id, segments a known video_id, a number start >= 0 and a
+#                string text (norm and src optional)
+#   monotonic    within a video, the starts of each source (src) never go backwards
+#   regression   against the previous index: not empty when it was not, and videos, segments and
+#                bytes shrink by at most VALIDATE_MAX_SHRINK (0.2); VALIDATE_MAX_SHRINK=1 lets an
+#                intentional cut through
+#
+# The previous index's counts come from its stats file (index.json -> index.stats.json, written
+# next to it on every publish); without one the previous index is streamed too.
+
+import os, re, sys, json
+
+VALIDATE_MAX_SHRINK = float(os.getenv("VALIDATE_MAX_SHRINK", "0.2"))
+CHUNK      = 1 << 20
+MAX_ERRORS = 10
+
+class IndexValidationError(ValueError):
+    def __init__(self, path, errors):
+        self.errors = errors
+        super().__init__(f"{path}: " + "; ".join(errors))
+
+def stats_path(path):
+    root, ext = os.path.splitext(path)
+    return f"{root}.stats{ext}"
+
+# ---------- streaming reader ----------
+_WS = re.compile(r"[ \t\r\n]*")
+
+class _Stream:
+    """Pulls JSON values one at a time out of a file read in CHUNK-sized pieces."""
+    _scan = json.JSONDecoder().scan_once
+
+    def __init__(self, f):
+        self.f, self.buf, self.pos, self.eof = f, "", 0, False
+
+    def _fill(self):
+        data = self.f.read(CHUNK)
+        self.buf, self.pos = self.buf[self.pos:] + data, 0
+        self.eof = not data
+
+    def peek(self):
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self._fill()
+
+    def expect(self, ch):
+        if self.peek() != ch:
+            raise ValueError(f"expected {ch!r} at byte ~{self.f.tell()}, got {self.peek() or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self):
+        while True:
+            self.peek()
+            try:
+                v, end = self._scan(self.buf, self.pos)
+            except (StopIteration, ValueError):  # StopIteration: no value starts here (yet)
+                end = None
+            if end is not None and (end < len(self.buf) or self.eof):  # a number may go on in the next chunk
+                self.pos = end
+                return v
+            if self.eof:
+                raise ValueError(f"invalid JSON value at byte ~{self.f.tell() - len(self.buf) + self.pos}")
+            self._fill()
+
+    def items(self):
+        """Yield the elements of the array whose '[' was just consumed, and consume its ']'."""
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        scan, ws = self._scan, _WS.match
+        while True:
+            try:  # fast path: the element and the separator after it are both in the buffer
+                buf = self.buf
+                v, end = scan(buf, self.pos)
+                end = ws(buf, end).end()
+                c = buf[end]
+                self.pos = end + 1
+            except (StopIteration, ValueError, IndexError):
+                v = self.value()
+                c = self.peek()
+                self.pos += 1
+            yield v
+            if c == "]":
+                return
+            if c != ",":
+                raise ValueError(f"expected ',' or ']' at byte ~{self.f.tell()}, got {c or 'end of file'!r}")
+            self.pos = ws(self.buf, self.pos).end()
+
+def iter_index(f):
+    """
+    Yield (key, value) per top-level key in file order, except that the "videos" and "segments"
+    arrays come as (key, []) followed by ("video", v) / ("segment", s) per element.
+    """
+    st = _Stream(f)
+    st.expect("{")
+    if st.peek() == "}":
+        return
+    while True:
+        key = st.value()
+        st.expect(":")
+        if key in ("videos", "segments") and st.peek() == "[":
+            kind = key[:-1]
+            yield key, []
+            st.expect("[")
+            for v in st.items():
+                yield kind, v
+        else:
+            yield key, st.value()
+        if st.peek() != ",":
+            break
+        st.expect(",")
+    st.expect("}")
+    if st.peek():
+        raise ValueError("trailing data after the index object")
+
+# ---------- checks ----------
+class Checker:
+    """
+    Accumulates the checks over an index fed piece by piece: by check() from the stream, or by
+    IndexWriter as it writes (so publishing never re-reads what it just wrote).
+    """
+    def __init__(self):
+        self.errors, self.keys = [], set()
+        self.video_ids, self.seg_videos = set(), set()
+        self.last = {}  # (video_id, src) -> last start
+        self.n_segments = 0
+
+    def err(self, msg):
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(msg)
+
+    def key(self, k, v):
+        self.keys.add(k)
+        if k in ("videos", "segments") and v != []:
+            self.err(f"{k} is not an array")
+        if k == "generated_at" and (isinstance(v, bool) or not isinstance(v, int)):
+            self.err(f"generated_at is not an integer: {v!r}")
+
+    def video(self, v):
+        vid = v.get("id") if isinstance(v, dict) else None
+        if not isinstance(vid, str) or not vid:
+            self.err(f"video {len(self.video_ids)}: missing id")
+        elif vid in self.video_ids:
+            self.err(f"video {vid}: listed twice")
+        self.video_ids.add(vid)
+
+    def segment(self, s):
+        i = self.n_segments
+        self.n_segments += 1
+        if not isinstance(s, dict):
+            return self.err(f"segment {i}: not an object")
+        vid, start, src = s.get("video_id"), s.get("start"), s.get("src")
+        if not isinstance(vid, str) or not vid:
+            return self.err(f"segment {i}: missing video_id")
+        if type(start) not in (int, float) or start < 0:
+            return self.err(f"segment {i} ({vid}): bad start {start!r}")
+        if type(s.get("text")) is not str:
+            self.err(f"segment {i} ({vid}): text is not a string")
+        if type(s.get("norm", "")) is not str or not (src is None or type(src) is str):
+            self.err(f"segment {i} ({vid}): norm/src is not a string")
+        self.seg_videos.add(vid)
+        if start < self.last.get((vid, src), 0):
+            self.err(f"segment {i} ({vid}, {src}): start {start} goes back from {self.last[vid, src]}")
+        self.last[vid, src] = start
+
+    def stats(self, size):
+        return {"videos": len(self.video_ids), "segments": self.n_segments, "bytes": size}
+
+    def finish(self, size):
+        """({"videos", "segments", "bytes"}, [error, ...]) once the whole index has been fed."""
+        for k in ("generated_at", "videos", "segments"):
+            if k not in self.keys:
+                self.err(f"missing {k}")
+        orphans = self.seg_videos - self.video_ids
+        if orphans:
+            self.err(f"{len(orphans)} video_id(s) with segments but not in videos, e.g. {sorted(orphans)[0]}")
+        return self.stats(size), self.errors
+
+def check(path):
+    """({"videos", "segments", "bytes"}, [error, ...]) for the index file at path."""
+    c = Checker()
+    segment, video, key = c.segment, c.video, c.key
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for kind, v in iter_index(f):
+                if kind == "segment":
+                    segment(v)
+                elif kind == "video":
+                    video(v)
+                else:
+                    key(kind, v)
+    except ValueError as e:  # includes UnicodeDecodeError and JSONDecodeError
+        c.err(f"not a valid index: {e}")
+        return c.stats(os.path.getsize(path)), c.errors
+    return c.finish(os.path.getsize(path))
+
+def previous_stats(path):
+    """Counts of the index currently at path: from its stats file if it matches, else by streaming it."""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return None
+    try:
+        with open(stats_path(path), "r", encoding="utf-8") as f:
+            stats = json.load(f)
+        if stats.get("bytes") == size:
+            return stats
+    except (OSError, ValueError, AttributeError):
+        pass
+    stats, errors = check(path)
+    return None if errors else stats  # a broken previous index sets no floor
+
+def regressions(stats, prev):
+    errors = []
+    if not prev:
+        return errors
+    if prev["segments"] and not stats["segments"]:
+        errors.append(f"no segments (previous index had {prev['segments']})")
+    for k in ("videos", "segments", "bytes"):
+        if prev[k] and stats[k] < prev[k] * (1 - VALIDATE_MAX_SHRINK):
+            errors.append(f"{k} dropped {prev[k]} -> {stats[k]} (more than {VALIDATE_MAX_SHRINK:.0%})")
+    return errors
+
+def gate(path, stats, errors, previous=None):
+    """Raise IndexValidationError for errors, or for regressions against the index at previous; else return stats."""
+    if not errors and previous:
+        errors = regressions(stats, previous_stats(previous))
+    if errors:
+        raise IndexValidationError(path, errors)
+    return stats
+
+def validate(path, previous=None):
+    """Stats of the index at path, checked on its own and against the index at previous if given."""
+    return gate(path, *check(path), previous)
+
+def main(argv):
+    if len(argv) not in (2, 3):
+        print("usage: validate_index.py INDEX [PREVIOUS]")
+        return 2
+    try:
+        stats = validate(argv[1], argv[2] if len(argv) == 3 else None)
+    except IndexValidationError as e:
+        print(f"❌ {argv[1]} failed validation:")
+        for msg in e.errors:
+            print(f"   {msg}")
+        return 1
+    print(f"✅ {argv[1]}: {stats['videos']} videos, {stats['segments']} segments, {stats['bytes'] / 1024:.0f} KiB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))